@@ -0,0 +1,68 @@
+"""
+Fails if any query issued by the Mongo repository falls back to a
+collection scan, or sorts in memory instead of walking an index. Run it against a local mongod after the index bootstrap:
+
+    cd app && python -m db.explain_check
+
+mongomock does not implement `explain`, so this needs a real server.
+"""
+import asyncio
+import sys
+from utils.auth_utils import configure, mongodb
+from utils.config import get_settings
+from db.migrations import ensure_user_indexes
+
+# Filters used by the Mongo query methods, keyed by method name.
+QUERY_SHAPES = {
+    "get_user": {"username": "explain-check"},
+    "get_users": {"username": {"$in": ["explain-check", "explain-check-2"]}},
+    "get_me_id": {"username": "explain-check"},
+    "get_user_by_username": {"username": "explain-check"},
+    "get_user_by_email": {"email": "explain-check@example.com"},
+    "get_user_by_github_id": {"github_id": 0},
+    "update_user": {"username": "explain-check"},
+    "delete_user": {"username": "explain-check"},
+}
+
+# Sorted queries, keyed by method and variant: (filter, sort).
+SORTED_QUERY_SHAPES = {
+    "list_users": ({"username": {"$gt": "explain-check"}}, [("username", 1)]),
+    "list_users(disabled)": ({"disabled": False, "username": {"$gt": ""}}, [("username", 1)]),
+    "list_users(is_superuser)": ({"is_superuser": True, "username": {"$gt": ""}}, [("username", 1)]),
+}
+
+def _stages(plan: dict):
+    yield plan.get("stage")
+    for child in ("inputStage", "queryPlan"):
+        if child in plan:
+            yield from _stages(plan[child])
+    for child in plan.get("inputStages", []):
+        yield from _stages(child)
+
+async def find_collection_scans() -> dict[str, dict]:
+    scans = {}
+    shapes = {method: (query, None) for method, query in QUERY_SHAPES.items()}
+    shapes.update(SORTED_QUERY_SHAPES)
+    for method, (query, sort) in shapes.items():
+        cursor = mongodb.collection.find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explanation = await cursor.explain()
+        winning_plan = explanation["queryPlanner"]["winningPlan"]
+        stages = set(_stages(winning_plan))
+        if "COLLSCAN" in stages or "SORT" in stages:
+            scans[method] = winning_plan
+    return scans
+
+async def main() -> int:
+    configure(get_settings())
+    await ensure_user_indexes(mongodb)
+    scans = await find_collection_scans()
+    for method, plan in scans.items():
+        print(f"COLLSCAN or in-memory SORT in Mongo.{method}: {plan}")
+    if not scans:
+        print(f"All {len(QUERY_SHAPES) + len(SORTED_QUERY_SHAPES)} query shapes use an index")
+    return 1 if scans else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,49 @@
+import logging
+from pymongo import ASCENDING, IndexModel
+from db.mongo import Mongo
+
+logger = logging.getLogger(__name__)
+
+USER_INDEXES = [
+    IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+    # GitHub accounts may have no public email, so only string emails are unique.
+    IndexModel(
+        [("email", ASCENDING)],
+        name="email_unique",
+        unique=True,
+        partialFilterExpression={"email": {"$type": "string"}}
+    ),
+    IndexModel([("github_id", ASCENDING)], name="github_id_sparse", sparse=True),
+    # Equality filter first, then the keyset sort key, for the admin listing.
+    IndexModel([("disabled", ASCENDING), ("username", ASCENDING)], name="disabled_username"),
+    IndexModel([("is_superuser", ASCENDING), ("username", ASCENDING)], name="is_superuser_username"),
+]
+
+_CHECKED_OPTIONS = ("unique", "sparse", "partialFilterExpression")
+
+async def verify_user_indexes(mongo: Mongo) -> list[str]:
+    """
+    Compare the live indexes of the users collection with USER_INDEXES and
+    return a description of every missing or mismatched index.
+    """
+    live = await mongo.collection.index_information()
+    problems = []
+    for index in USER_INDEXES:
+        spec = index.document
+        name = spec["name"]
+        if name not in live:
+            problems.append(f"missing index {name}")
+            continue
+        if [tuple(key) for key in live[name]["key"]] != list(spec["key"].items()):
+            problems.append(f"index {name} has keys {live[name]['key']}")
+        for option in _CHECKED_OPTIONS:
+            if live[name].get(option) != spec.get(option):
+                problems.append(f"index {name} has {option}={live[name].get(option)!r}")
+    return problems
+
+async def ensure_user_indexes(mongo: Mongo) -> None:
+    await mongo.collection.create_indexes(USER_INDEXES)
+    problems = await verify_user_indexes(mongo)
+    if problems:
+        raise RuntimeError(f"Users collection indexes are not as expected: {'; '.join(problems)}")
+    logger.info("Users collection indexes verified")
@@ -1,42 +1,208 @@
+import importlib.util
+import inspect
+import logging
 import pymongo as mg
-from utils.config import MONGO_CONNECTION_STRING
 from bson.objectid import ObjectId
+from pydantic import ValidationError
+from pymongo import ReadPreference
+from pymongo.read_concern import ReadConcern
 from routers.models import UserInDB
+from utils.metrics import instrument_mongo
 import motor.motor_asyncio
 
+# Fields needed to build a UserInDB; everything else stays on the server.
+AUTH_PROJECTION = {
+    "_id": 1, "username": 1, "email": 1,
+    "hashed_password": 1, "disabled": 1, "is_superuser": 1, "version": 1
+}
+PROFILE_PROJECTION = {
+    "_id": 0, "username": 1, "email": 1, "disabled": 1, "is_superuser": 1
+}
+ID_PROJECTION = {"_id": 1}
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+# Wire compressors and the module each one needs; zlib is built in.
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+logger = logging.getLogger(__name__)
+
+def available_compressors(requested: str) -> str:
+    """Keep the requested compressors whose module is installed, in order."""
+    names = [name.strip() for name in requested.split(",") if name.strip()]
+    available = [
+        name for name in names
+        if name in COMPRESSOR_MODULES and importlib.util.find_spec(COMPRESSOR_MODULES[name])
+    ]
+    if len(available) < len(names):
+        logger.info("Mongo compressors %s unavailable, using %s", names, available or "none")
+    return ",".join(available)
+
+class DuplicateUserError(Exception):
+    """Raised when an insert violates the unique username or email index."""
+
+    def __init__(self, field: str):
+        super().__init__(f"A user with this {field} already exists")
+        self.field = field
+
+def _duplicate_field(details: dict | None, message: str) -> str:
+    key_pattern = (details or {}).get("keyPattern") or {}
+    for field in ("username", "email"):
+        if field in key_pattern or f"{field}_" in message:
+            return field
+    return "username"
+
 class Mongo():
-    def __init__(self, db: str, collection: str):
-        self.url = MONGO_CONNECTION_STRING
+    """
+    User repository. The Motor client is created on first use, not at
+    import, so importing the app stays cheap and each forked worker builds
+    its own client inside its event loop. `client`, `db` and `collection`
+    can also be assigned directly (e.g. a mongomock client).
+
+    `client_options` are passed to the Motor client (pool sizes, timeouts,
+    compressors, event listeners). Writes and per-user reads use the client
+    defaults, i.e. the primary, so users always read their own writes; only
+    the admin listing and export, which tolerate slight staleness, use
+    `profile_read_preference` and `profile_read_concern`.
+    """
+
+    def __init__(
+        self,
+        url: str | None = None,
+        db: str | None = None,
+        collection: str | None = None,
+        client_options: dict | None = None,
+        profile_read_preference: str = "primary",
+        profile_read_concern: str | None = None
+    ):
+        self._client = None
+        self._change_listeners = []
+        self.configure(url, db, collection, client_options, profile_read_preference, profile_read_concern)
+
+    def configure(
+        self,
+        url: str | None = None,
+        db: str | None = None,
+        collection: str | None = None,
+        client_options: dict | None = None,
+        profile_read_preference: str = "primary",
+        profile_read_concern: str | None = None
+    ) -> None:
+        """Set the connection options; a client created before is closed."""
+        self.close()
+        self.url = url
         self.db_name = db
         self.collection_name = collection
-        self.client = motor.motor_asyncio.AsyncIOMotorClient(self.url)
-        self.db = self.client[self.db_name]
-        self.collection = self.db[self.collection_name]
+        self.client_options = client_options or {}
+        self.profile_read_preference = READ_PREFERENCES[profile_read_preference]
+        self.profile_read_concern = ReadConcern(profile_read_concern)
+        self._client = None
+        self._db = None
+        self._collection = None
+        self._profile_collection = None
 
-    def _connect(self) -> None:
-        try:
-            self.client = mg.MongoClient(self.url)
-            self.db = self.client[self.db_name]
-            self.collection = self.db[self.collection_name]
-        except mg.errors.ConnectionFailure as e:
-            print(f"Connection error: {e}")
-        finally:
-            print("Connected to MongoDB")
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = motor.motor_asyncio.AsyncIOMotorClient(self.url, **self.client_options)
+        return self._client
+
+    @client.setter
+    def client(self, client) -> None:
+        self._client = client
+
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = self.client[self.db_name]
+        return self._db
+
+    @db.setter
+    def db(self, db) -> None:
+        self._db = db
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            self._collection = self.db[self.collection_name]
+        return self._collection
+
+    @collection.setter
+    def collection(self, collection) -> None:
+        self._collection = collection
+        self._profile_collection = None
+
+    @property
+    def profile_collection(self):
+        if self._profile_collection is None:
+            self._profile_collection = self.collection.database.get_collection(
+                self.collection.name,
+                read_preference=self.profile_read_preference,
+                read_concern=self.profile_read_concern
+            )
+        return self._profile_collection
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+
+    def add_change_listener(self, listener) -> None:
+        """
+        Register a callable (sync or async) invoked with the username after
+        `update_user` or `delete_user` changes a user document.
+        """
+        self._change_listeners.append(listener)
+
+    async def _notify_change(self, username: str) -> None:
+        for listener in self._change_listeners:
+            result = listener(username)
+            if inspect.isawaitable(result):
+                await result
 
     def _get_collection(self, collection: str):
         return self.db[collection]
 
+    @staticmethod
+    def _user_in_db(user: dict) -> UserInDB:
+        return UserInDB(
+            id=str(user["_id"]),
+            username=user["username"],
+            email=user["email"],
+            hashed_password=user["hashed_password"],
+            disabled=user.get("disabled", False),
+            is_superuser=user.get("is_superuser", False),
+            version=user.get("version", 0)
+        )
+
+    @instrument_mongo
     async def get_user(self, username: str):
-        user = await self.collection.find_one({"username": username})
+        user = await self.collection.find_one({"username": username}, AUTH_PROJECTION)
         if user:
-            return UserInDB(
-                username=user["username"],
-                email=user["email"],
-                hashed_password=user["hashed_password"],
-                disabled=user.get("disabled", False)
-            )
+            return self._user_in_db(user)
         return None
 
+    @instrument_mongo
+    async def get_users(self, usernames: list[str]) -> dict[str, UserInDB]:
+        """
+        `get_user` for many usernames in one `$in` query, keyed by username.
+        A document that does not validate is logged and left out, so it
+        does not fail the lookups batched with it.
+        """
+        cursor = self.collection.find({"username": {"$in": usernames}}, AUTH_PROJECTION)
+        users = {}
+        async for user in cursor:
+            try:
+                users[user["username"]] = self._user_in_db(user)
+            except ValidationError:
+                logger.warning("Skipping invalid user document %r", user["username"], exc_info=True)
+        return users
+
     def _user_helper(self, user) -> dict:
         return {
             "id": str(user["_id"]),
@@ -55,33 +221,108 @@ class Mongo():
             self.db.create_collection(collection)
             print(f"Collection {collection} created")
 
+    @instrument_mongo
     async def create_user(self, user: dict) -> dict:
-            result = await self.collection.insert_one(user)
-            return await self.collection.find_one({"_id": result.inserted_id})
+        """
+        Insert a user in a single round trip, relying on the unique indexes
+        to reject duplicates. Returns the inserted document without
+        re-reading it.
+        """
+        document = dict(user)
+        try:
+            result = await self.collection.insert_one(document)
+        except mg.errors.DuplicateKeyError as e:
+            raise DuplicateUserError(_duplicate_field(e.details, str(e))) from e
+        document["_id"] = result.inserted_id
+        return document
+
+    @instrument_mongo
+    async def insert_users(self, users: list[dict]) -> dict[int, str]:
+        """
+        Insert a batch with one unordered insert_many: every valid document
+        is written even when others fail. Returns the failures as
+        {batch index: reason}, "username"/"email" for duplicates.
+        """
+        try:
+            await self.collection.insert_many([dict(user) for user in users], ordered=False)
+        except mg.errors.BulkWriteError as e:
+            failures = {}
+            for error in e.details.get("writeErrors", []):
+                if error.get("code") == 11000:
+                    failures[error["index"]] = _duplicate_field(error, error.get("errmsg", ""))
+                else:
+                    failures[error["index"]] = error.get("errmsg", "write error")
+            return failures
+        return {}
+
+    @instrument_mongo
+    async def list_users(
+        self,
+        after: str | None = None,
+        limit: int = 50,
+        filters: dict | None = None,
+        projection: dict = PROFILE_PROJECTION
+    ) -> list[dict]:
+        """
+        One page of users ordered by username, starting after `after`.
+        Keyset pagination: every page is an index range scan of `limit`
+        entries (username_unique, or the {filter, username} compound
+        indexes), so page N costs the same as page 1.
+        """
+        query = dict(filters or {})
+        if after is not None:
+            query["username"] = {"$gt": after}
+        cursor = self.profile_collection.find(query, projection).sort("username", 1).limit(limit)
+        return await cursor.to_list(length=limit)
 
-    async def get_me_id(self, username: str) -> str:
-        user = await self.collection.find_one({"username" : username})
-        return str(user["_id"])
+    async def iter_users(self, projection: dict = PROFILE_PROJECTION, batch_size: int = 1000):
+        """
+        Yield every user document from a cursor that fetches `batch_size`
+        documents per round trip, so memory stays flat for any collection size.
+        """
+        async for user in self.profile_collection.find({}, projection, batch_size=batch_size):
+            yield user
 
-    async def get_user_by_github_id(self, github_id: int):
-        return await self.collection.find_one({"github_id": github_id})
+    @instrument_mongo
+    async def get_me_id(self, username: str) -> str | None:
+        user = await self.collection.find_one({"username" : username}, ID_PROJECTION)
+        return str(user["_id"]) if user else None
 
-    async def get_user_by_username(self, username: str) -> dict:
-        return await self.collection.find_one({"username": username})
+    @instrument_mongo
+    async def get_user_by_github_id(self, github_id: int, projection: dict | None = None):
+        return await self.collection.find_one({"github_id": github_id}, projection)
 
-    async def get_user_by_email(self, email: str):
-        return await self.collection.find_one({"email": email})
+    @instrument_mongo
+    async def get_user_by_username(self, username: str, projection: dict | None = None) -> dict:
+        return await self.collection.find_one({"username": username}, projection)
 
-    async def update_user(self, username: str, data: dict) -> bool:
+    @instrument_mongo
+    async def get_user_by_email(self, email: str, projection: dict | None = None):
+        return await self.collection.find_one({"email": email}, projection)
+
+    @instrument_mongo
+    async def update_user(self, username: str, data: dict, expected: dict | None = None) -> bool:
+        """
+        `expected` adds conditions on the current document, making the
+        update a compare-and-set (e.g. only if the password hash is unchanged).
+        Raises DuplicateUserError when the change hits a unique index.
+        """
         if len(data) < 1:
             return False
-        result = await self.collection.update_one(
-            {"username": username}, {"$set": data}
-        )
+        # The version counter backs the /users/me ETag.
+        try:
+            result = await self.collection.update_one(
+                {**(expected or {}), "username": username}, {"$set": data, "$inc": {"version": 1}}
+            )
+        except mg.errors.DuplicateKeyError as e:
+            raise DuplicateUserError(_duplicate_field(e.details, str(e))) from e
+        await self._notify_change(username)
         return result.modified_count > 0
 
+    @instrument_mongo
     async def delete_user(self, username: str) -> bool:
         result = await self.collection.delete_one({"username": username})
+        await self._notify_change(username)
         return result.deleted_count > 0
 
 if __name__ == "__main__":
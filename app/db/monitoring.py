@@ -0,0 +1,89 @@
+import threading
+from pymongo import monitoring
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """
+    Connection pool counters fed by PyMongo's pool events. Events arrive on
+    Motor's executor threads, so updates take a lock; the metrics registry
+    reads the counters at scrape time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.in_use = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.checkout_wait_seconds = 0.0
+        self.max_checkout_wait_seconds = 0.0
+        self.pool_clears = 0
+
+    def connection_created(self, event) -> None:
+        with self._lock:
+            self.open += 1
+
+    def connection_closed(self, event) -> None:
+        with self._lock:
+            self.open -= 1
+
+    def connection_checked_out(self, event) -> None:
+        wait = event.duration or 0.0
+        with self._lock:
+            self.in_use += 1
+            self.checkouts += 1
+            self.checkout_wait_seconds += wait
+            self.max_checkout_wait_seconds = max(self.max_checkout_wait_seconds, wait)
+
+    def connection_checked_in(self, event) -> None:
+        with self._lock:
+            self.in_use -= 1
+
+    def connection_check_out_failed(self, event) -> None:
+        with self._lock:
+            self.checkout_failures += 1
+
+    def pool_cleared(self, event) -> None:
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_check_out_started(self, event) -> None:
+        pass
+
+class CommandStats(monitoring.CommandListener):
+    """Per-command counts, failures and total server round-trip time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.commands: dict[str, list[float]] = {}
+
+    def _record(self, name: str, seconds: float, failed: bool) -> None:
+        with self._lock:
+            stats = self.commands.setdefault(name, [0, 0, 0.0])
+            stats[0] += 1
+            stats[1] += failed
+            stats[2] += seconds
+
+    def snapshot(self) -> dict[str, list[float]]:
+        with self._lock:
+            return {name: list(stats) for name, stats in self.commands.items()}
+
+    def started(self, event) -> None:
+        pass
+
+    def succeeded(self, event) -> None:
+        self._record(event.command_name, event.duration_micros / 1e6, False)
+
+    def failed(self, event) -> None:
+        self._record(event.command_name, event.duration_micros / 1e6, True)
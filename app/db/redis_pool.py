@@ -0,0 +1,110 @@
+from redis.asyncio import ConnectionPool, Redis
+from utils.config import Settings
+
+class RedisPool():
+    """
+    Application-wide asyncio Redis connection pool. `connect` and `close`
+    are called from the application lifespan; clients handed out by
+    `client()` share the pool and need no explicit cleanup. Long-lived
+    pub/sub subscriptions use `subscriber()`, backed by a separate pool
+    without a read timeout, since an idle channel is not an error.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        max_connections: int = 50,
+        socket_timeout: float = 1.0,
+        socket_connect_timeout: float = 1.0,
+        health_check_interval: int = 30
+    ):
+        self.pool: ConnectionPool | None = None
+        self.subscriber_pool: ConnectionPool | None = None
+        self._client: Redis | None = None
+        self._subscriber: Redis | None = None
+        self.configure(host, port, max_connections, socket_timeout, socket_connect_timeout, health_check_interval)
+
+    def configure(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        max_connections: int = 50,
+        socket_timeout: float = 1.0,
+        socket_connect_timeout: float = 1.0,
+        health_check_interval: int = 30
+    ) -> None:
+        """Set the connection options; takes effect at the next `connect`."""
+        self.host = host
+        self.port = port
+        self.max_connections = max_connections
+        self.socket_timeout = socket_timeout
+        self.socket_connect_timeout = socket_connect_timeout
+        self.health_check_interval = health_check_interval
+
+    def connect(self, client: Redis | None = None) -> None:
+        """
+        Create the pool, or adopt an existing client instead (for example a
+        fakeredis instance when running without a Redis server).
+        """
+        if client is not None:
+            self._client = client
+            self._subscriber = client
+            return
+        if self._client is not None:
+            return
+        self.pool = ConnectionPool(
+            host=self.host,
+            port=self.port,
+            max_connections=self.max_connections,
+            socket_timeout=self.socket_timeout,
+            socket_connect_timeout=self.socket_connect_timeout,
+            health_check_interval=self.health_check_interval
+        )
+        self._client = Redis(connection_pool=self.pool)
+        # Keepalive and health checks detect a dead subscriber connection
+        # instead of a read timeout.
+        self.subscriber_pool = ConnectionPool(
+            host=self.host,
+            port=self.port,
+            socket_timeout=None,
+            socket_connect_timeout=self.socket_connect_timeout,
+            socket_keepalive=True,
+            health_check_interval=self.health_check_interval
+        )
+        self._subscriber = Redis(connection_pool=self.subscriber_pool)
+
+    def client(self) -> Redis:
+        if self._client is None:
+            raise RuntimeError("Redis pool is not connected")
+        return self._client
+
+    def subscriber(self) -> Redis:
+        if self._subscriber is None:
+            raise RuntimeError("Redis pool is not connected")
+        return self._subscriber
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self.pool is not None:
+            await self.pool.disconnect()
+            self.pool = None
+        if self.subscriber_pool is not None:
+            await self._subscriber.aclose()
+            await self.subscriber_pool.disconnect()
+            self.subscriber_pool = None
+        self._subscriber = None
+
+redis_pool = RedisPool()
+
+def configure(settings: Settings) -> None:
+    redis_pool.configure(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        max_connections=settings.redis_max_connections,
+        socket_timeout=settings.redis_socket_timeout,
+        socket_connect_timeout=settings.redis_socket_connect_timeout,
+        health_check_interval=settings.redis_health_check_interval
+    )
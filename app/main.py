@@ -1,37 +1,141 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from slowapi.errors import RateLimitExceeded
 from routers.auth.auth import auth_router
 from routers.api.api import api_router
+from routers.admin.admin import admin_router
 from routers.other.health import app_health, app_about
+from routers.other.metrics import app_metrics
+from routers.limiter import limiter, rate_limit_exceeded_handler
+from utils.metrics import MetricsMiddleware, registry
+from utils.auth_utils import password_hasher, mongodb
+from utils.config import Settings, get_settings
+from db.migrations import ensure_user_indexes
+from db.redis_pool import redis_pool
+from utils.cache import cache_invalidator
+from utils.http_client import outbound_http
+from utils.responses import ORJSONResponse
+from utils.etag import ETagMiddleware
+from utils.health import health_checker
+from utils.audit import audit_log
+import db.redis_pool
+import routers.limiter
+import utils.audit
+import utils.auth_utils
+import utils.health
+import utils.http_client
+import utils.metrics
+import logging
 import uvicorn
 
-app = FastAPI(
-    title="FastAPI JWT Template",
-    summary="This is a template for FastAPI with authentication logic using JWT",
-    version="1.0.0",
-)
-
-origins = [
-    "0.0.0.0:8080/docs"
-]
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-app.include_router(auth_router)
-app.include_router(api_router)
-app.include_router(app_health)
-app.include_router(app_about)
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = app.state.settings
+    if settings.mongo_ensure_indexes:
+        await ensure_user_indexes(mongodb)
+    redis_pool.connect()
+    cache_invalidator.start()
+    outbound_http.start()
+    registry.start()
+    audit_log.start()
+    await health_checker.warm_up(settings.warmup_connections)
+    health_checker.install_drain_handler(settings.server_drain_delay)
+    yield
+    health_checker.mark_stopping()
+    # Flushed before the Mongo client closes so queued events are written.
+    await audit_log.stop(settings.audit_shutdown_timeout)
+    await registry.stop()
+    await outbound_http.close()
+    await cache_invalidator.stop()
+    await redis_pool.close()
+    mongodb.close()
+    password_hasher.shutdown()
+
+def configure(settings: Settings) -> None:
+    """Apply `settings` to the module singletons (Mongo, Redis, limiter, ...)."""
+    utils.metrics.configure(settings)
+    db.redis_pool.configure(settings)
+    utils.auth_utils.configure(settings)
+    utils.http_client.configure(settings)
+    utils.health.configure(settings)
+    utils.audit.configure(settings)
+    routers.limiter.configure(settings)
+
+def create_app(settings: Settings | None = None) -> FastAPI:
+    """
+    Build the application from `settings`, read from the environment by
+    default. The singletons it runs on are per process, so they follow the
+    settings of the app created last.
+    """
+    settings = settings or get_settings()
+    configure(settings)
+
+    app = FastAPI(
+        title="FastAPI JWT Template",
+        summary="This is a template for FastAPI with authentication logic using JWT",
+        version="1.0.0",
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse,
+    )
+
+    app.state.settings = settings
+    app.state.limiter = limiter
+    app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
+
+    origins = [
+        "0.0.0.0:8080/docs"
+    ]
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    app.include_router(auth_router)
+    app.include_router(api_router)
+    app.include_router(admin_router)
+    app.include_router(app_health)
+    app.include_router(app_about)
+    app.include_router(app_metrics)
+
+    # Middleware added last runs first: ETags are computed on the uncompressed
+    # body, and the metrics middleware times the whole stack.
+    app.add_middleware(ETagMiddleware, max_size=settings.etag_max_body_size)
+    if settings.compression == "brotli" and BrotliMiddleware is not None:
+        app.add_middleware(
+            BrotliMiddleware,
+            quality=settings.compression_level,
+            minimum_size=settings.compression_minimum_size,
+            gzip_fallback=True
+        )
+    elif settings.compression in ("gzip", "brotli"):
+        if settings.compression == "brotli":
+            logger.warning("Brotli compression requested but brotli-asgi is not installed, using gzip")
+        app.add_middleware(
+            GZipMiddleware,
+            minimum_size=settings.compression_minimum_size,
+            compresslevel=min(max(settings.compression_level, 1), 9)
+        )
+    app.add_middleware(MetricsMiddleware)
+    return app
 
 if __name__ == "__main__":
     uvicorn.run(
-        "main:app", 
+        "main:create_app",
+        factory=True,
         host="0.0.0.0",
-        port=8080, 
+        port=8080,
         reload=True
-    )
\ No newline at end of file
+    )
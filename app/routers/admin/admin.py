@@ -0,0 +1,153 @@
+import orjson
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from routers.models import User, UserImport
+from routers.limiter import limiter
+from utils.auth_utils import mongodb, password_hasher, get_current_superuser
+from utils.config import Settings, get_app_settings
+from utils.audit import audit_log
+
+admin_router = APIRouter(
+    prefix="/admin",
+    tags=["Administration"],
+    responses={
+        403: {"description": "Superuser privileges required"},
+        401: {"description": "Unauthorized access"}
+    }
+)
+
+# Only the first errors are listed in the report; the count covers all of them.
+MAX_REPORTED_ERRORS = 1000
+
+async def _ndjson_lines(request: Request, max_line_bytes: int):
+    """
+    Yield (line number, line) from the request body without buffering it
+    whole. Lines longer than `max_line_bytes` are yielded as None; their
+    bytes are discarded as they arrive, so memory stays bounded.
+    """
+    buffer = b""
+    line_number = 0
+    oversized = False
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            yield line_number, None if oversized or len(line) > max_line_bytes else line
+            oversized = False
+        if len(buffer) > max_line_bytes:
+            oversized = True
+            buffer = b""
+    if buffer or oversized:
+        yield line_number + 1, None if oversized else buffer
+
+class ImportReport():
+    def __init__(self):
+        self.inserted = 0
+        self.failed = 0
+        self.errors: list[dict] = []
+
+    def error(self, line: int, reason: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": reason})
+
+    def as_dict(self) -> dict:
+        return {
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors)
+        }
+
+async def _import_batch(batch: list[tuple[int, UserImport]], report: ImportReport) -> None:
+    hashed_passwords = await password_hasher.hash_many([user.password for _, user in batch])
+    documents = [
+        {
+            "username": user.username,
+            "email": user.email,
+            "hashed_password": hashed_password,
+            "disabled": False,
+            "is_superuser": False
+        }
+        for (_, user), hashed_password in zip(batch, hashed_passwords)
+    ]
+    failures = await mongodb.insert_users(documents)
+    for index, reason in sorted(failures.items()):
+        if reason in ("username", "email"):
+            reason = f"{reason} already registered"
+        report.error(batch[index][0], reason)
+    report.inserted += len(batch) - len(failures)
+
+@admin_router.post(
+    "/users/import",
+    summary="Bulk Import Users",
+    description="Creates users from an NDJSON body, one {username, email, password} object per line.",
+    response_description="Returns the number of inserted users and the errors per line.",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/x-ndjson": {"schema": {"type": "string"}}}
+        }
+    }
+)
+@limiter.limit('1/second')
+async def import_users(
+    request: Request,
+    current_user: User = Depends(get_current_superuser),
+    settings: Settings = Depends(get_app_settings)
+) -> dict:
+    """
+    Import users in batches: passwords of a batch are hashed in parallel on
+    the hasher pool, then the batch is written with one unordered
+    insert_many, so duplicates and invalid rows are reported without
+    stopping the import.
+    """
+    report = ImportReport()
+    batch: list[tuple[int, UserImport]] = []
+
+    async for line_number, line in _ndjson_lines(request, settings.admin_import_max_line_bytes):
+        if line is None:
+            report.error(line_number, f"Line is longer than {settings.admin_import_max_line_bytes} bytes")
+            continue
+        if not line.strip():
+            continue
+        try:
+            batch.append((line_number, UserImport.model_validate_json(line)))
+        except ValidationError as e:
+            report.error(line_number, e.errors(include_url=False)[0]["msg"])
+            continue
+        if len(batch) >= settings.admin_import_batch_size:
+            await _import_batch(batch, report)
+            batch = []
+    if batch:
+        await _import_batch(batch, report)
+
+    audit_log.record("users_imported", current_user.username, request, inserted=report.inserted, failed=report.failed)
+    return report.as_dict()
+
+@admin_router.get(
+    "/users/export",
+    summary="Bulk Export Users",
+    description="Streams every user profile as NDJSON, one JSON object per line.",
+    response_description="An application/x-ndjson stream of user profiles."
+)
+@limiter.limit('1/second')
+async def export_users(
+    request: Request,
+    batch_size: int | None = Query(None, ge=1, le=10000, description="Documents fetched per cursor round trip"),
+    current_user: User = Depends(get_current_superuser),
+    settings: Settings = Depends(get_app_settings)
+) -> StreamingResponse:
+    """
+    Stream users straight from a Mongo cursor; only one cursor batch is in
+    memory at a time.
+    """
+    batch_size = batch_size or settings.admin_export_batch_size
+
+    async def lines():
+        async for user in mongodb.iter_users(batch_size=batch_size):
+            yield orjson.dumps(user) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -1,18 +1,16 @@
-import json
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from routers.models import User
+import base64
+import binascii
+from typing import Optional
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from routers.models import User, UserPage
+from db.mongo import DuplicateUserError
 from routers.auth.auth import mongodb
 from utils.auth_utils import *
 from routers.limiter import limiter
-from redis import Redis
-from utils.config import REDIS_HOST, REDIS_PORT
-
-async def get_redis() -> Redis:
-    redis = Redis(host=REDIS_HOST, port=REDIS_PORT)
-    try:
-        yield redis
-    finally:
-        redis.close()
+from utils.responses import ModelResponse
+from utils.etag import weak_etag, etag_matches
+from utils.audit import audit_log
 
 api_router = APIRouter(
     prefix="/api/v1",
@@ -36,8 +34,7 @@ api_router = APIRouter(
 @limiter.limit('5/second')
 async def read_users_me(
     request: Request,
-    current_user: User = Depends(get_current_active_user),
-    redis: Redis = Depends(get_redis)
+    current_user: User = Depends(get_current_active_user)
 ) -> User:
     """
     Fetch details of the currently authenticated user.
@@ -51,16 +48,84 @@ async def read_users_me(
 
     Rate Limit:
         5 requests per second
+
+    The ETag follows the user's document id and version, so polling clients
+    sending If-None-Match get a 304, and a user deleted and registered again
+    under the same name gets a new ETag. The body is rendered from the same loaded user,
+    so it always matches the ETag.
     """
-    value = redis.get(current_user.username)
-    
-    if value is None:
-        data = current_user.model_dump_json()
-        redis.set(current_user.username, json.dumps(data))
-        return current_user
+    headers = {
+        "ETag": weak_etag(str(current_user.id), str(current_user.version)),
+        "Cache-Control": "private, no-cache"
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
-    cached_data = json.loads(value)
-    return User(**cached_data)
+    return ModelResponse(
+        User(**current_user.model_dump(exclude={"id", "hashed_password", "version"})),
+        headers=headers
+    )
+
+LISTABLE_FIELDS = ("username", "email", "disabled", "is_superuser")
+
+def _encode_cursor(username: str, filters: dict) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps({"after": username, "filters": filters})).decode()
+
+def _decode_cursor(cursor: str, filters: dict) -> str:
+    invalid_cursor = HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    try:
+        decoded = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError):
+        raise invalid_cursor
+    if not isinstance(decoded, dict) or not isinstance(decoded.get("after"), str):
+        raise invalid_cursor
+    # A cursor continues one specific listing; reusing it with other filters would skip users.
+    if decoded.get("filters") != filters:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor does not match the filters")
+    return decoded["after"]
+
+@api_router.get(
+    "/users",
+    response_model=UserPage,
+    summary="List Users",
+    description="Lists users ordered by username, one page at a time. Superusers only.",
+    response_description="Returns a page of users and the cursor for the next page (null on the last page)."
+)
+@limiter.limit('5/second')
+async def list_users(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    fields: Optional[str] = Query(None, description=f"Comma separated subset of {', '.join(LISTABLE_FIELDS)}"),
+    disabled: Optional[bool] = None,
+    is_superuser: Optional[bool] = None,
+    current_user: User = Depends(get_current_superuser)
+) -> UserPage:
+    """
+    List users with keyset pagination: each page continues after the last
+    username of the previous one through an index range scan, so deep
+    pages are as fast as the first. The cursor is opaque to clients.
+    """
+    requested = [field.strip() for field in fields.split(",") if field.strip()] if fields else list(LISTABLE_FIELDS)
+    unknown = set(requested) - set(LISTABLE_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    # username is the pagination key, so it is always returned.
+    projection = {"_id": 0, "username": 1, **{field: 1 for field in requested}}
+
+    filters = {}
+    if disabled is not None:
+        filters["disabled"] = disabled
+    if is_superuser is not None:
+        filters["is_superuser"] = is_superuser
+
+    after = _decode_cursor(cursor, filters) if cursor else None
+    users = await mongodb.list_users(after=after, limit=limit + 1, filters=filters, projection=projection)
+    next_cursor = _encode_cursor(users[limit - 1]["username"], filters) if len(users) > limit else None
+    return ModelResponse(UserPage(users=users[:limit], next_cursor=next_cursor))
 
 @api_router.get(
     "/users/me/id",
@@ -76,7 +141,10 @@ async def get_me_id(
     """
     Fetch the database ID of the currently authenticated user.
     """
-    return await mongodb.get_me_id(current_user.username)
+    user_id = await mongodb.get_me_id(current_user.username)
+    if user_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return user_id
 
 @api_router.get(
     "/welcome/{username}",
@@ -109,6 +177,7 @@ async def delete_user(
     Delete the currently authenticated user's account from the system.
     """
     await mongodb.delete_user(current_user.username)
+    audit_log.record("user_deleted", current_user.username, request)
     return {"message": "User deleted successfully"}
 
 @api_router.put(
@@ -138,15 +207,23 @@ async def update_user_email(
             detail="Cannot update email to the same value"
         )
 
-    update_success = await mongodb.update_user(current_user.username, user_data)
-    
+    try:
+        update_success = await mongodb.update_user(current_user.username, user_data)
+    except DuplicateUserError:
+        # Only the email changes here, so it is the field that collided.
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+
     if not update_success:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Failed to update user"
         )
 
-    return User(username=current_user.username, email=email, disabled=False)
+    audit_log.record("email_changed", current_user.username, request)
+    return ModelResponse(User(username=current_user.username, email=email, disabled=False))
 
 @api_router.put(
     "/users/me/password",
@@ -164,17 +241,17 @@ async def update_user_password(
     """
     Update the password of the currently authenticated user.
     """
-    user_data = {
-        "hashed_password": get_password_hash(password),
-        "disabled": False
-    }
-
-    if password == current_user.password:
+    if await verify_password(password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot update password to the same value"
         )
 
+    user_data = {
+        "hashed_password": await get_password_hash(password),
+        "disabled": False
+    }
+
     update_success = await mongodb.update_user(current_user.username, user_data)
 
     if not update_success:
@@ -183,4 +260,7 @@ async def update_user_password(
             detail="Failed to update user"
         )
 
-    return User(username=current_user.username, email=current_user.email, disabled=False)
\ No newline at end of file
+    audit_log.record("password_changed", current_user.username, request)
+    return ModelResponse(
+        User(username=current_user.username, email=current_user.email, disabled=False)
+    )
\ No newline at end of file
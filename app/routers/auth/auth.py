@@ -1,24 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, status, Security
 from fastapi.responses import RedirectResponse
 from fastapi.security import OAuth2PasswordRequestForm, APIKeyHeader
-from datetime import timedelta
 import httpx
+from jose import JWTError
 from utils.auth_utils import (
     mongodb,
     authenticate_user,
-    create_access_token,
-    get_password_hash
+    create_token_pair,
+    get_password_hash,
+    oauth2_scheme,
+    revoke_token,
+    token_verifier
 )
-from routers.models import Token, User, UserCreate
+from routers.models import RefreshRequest, Token, User, UserCreate
+from db.mongo import PROFILE_PROJECTION, DuplicateUserError
 from routers.limiter import limiter
-from utils.config import (
-    ACCESS_TOKEN_EXPIRE_MINUTES,
-    GITHUB_CLIENT_ID,
-    GITHUB_CLIENT_SECRET,
-    ACTIVATE_OAUTH2,
-    ACTIVATE_GITHUB,
-    ACTIVATE_MICROSOFT
-)
+from utils.http_client import outbound_http
+from utils.audit import audit_log
+from utils.responses import ModelResponse
+from utils.config import Settings, get_app_settings
 
 auth_router = APIRouter(
     prefix="/auth",
@@ -38,6 +38,11 @@ API_KEYS = [
     "197138fd0ab4af061a1a3d1044df7f10f2d93c7a1596c12695f1b73cc1afab68",
 ]
 
+DUPLICATE_USER_DETAILS = {
+    "username": "Username already registered",
+    "email": "Email already registered"
+}
+
 api_key_header = APIKeyHeader(name="X-API-KEY", auto_error=False)
 
 def get_api_key(api_key_header: str = Security(api_key_header)):
@@ -65,16 +70,78 @@ async def login(
     """
     user = await authenticate_user(form_data.username, form_data.password)
     if not user:
+        audit_log.record("login_failed", form_data.username, request)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token_expires = timedelta(minutes=int(ACCESS_TOKEN_EXPIRE_MINUTES))
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+    audit_log.record("login", user.username, request)
+    return create_token_pair(user.username)
+
+@auth_router.post(
+    "/refresh",
+    response_model=Token,
+    summary="Refresh Tokens",
+    description="Exchanges a valid refresh token for a new access token and refresh token without re-entering the password.",
+    response_description="Returns a new access token and a new refresh token; the submitted refresh token is revoked."
+)
+@limiter.limit('5/second')
+async def refresh(
+    request: Request,
+    body: RefreshRequest
+) -> Token:
+    """
+    Rotate a refresh token. Each refresh token can be used exactly once.
+    """
+    invalid_token = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    try:
+        payload = token_verifier.decode(body.refresh_token)
+    except JWTError:
+        raise invalid_token
+    if payload.get("type") != "refresh" or not payload.get("sub"):
+        raise invalid_token
+
+    # Revoking first makes rotation atomic: a replayed token loses the race.
+    if not await revoke_token(payload):
+        raise invalid_token
+
+    user = await mongodb.get_user(payload["sub"])
+    if user is None or user.disabled:
+        raise invalid_token
+    return create_token_pair(user.username)
+
+@auth_router.post(
+    "/logout",
+    summary="Logout User",
+    description="Revokes the current access token and, if provided, the refresh token.",
+    response_description="Returns a success message once the tokens are revoked."
+)
+@limiter.limit('5/second')
+async def logout(
+    request: Request,
+    body: RefreshRequest | None = None,
+    token: str = Depends(oauth2_scheme)
+) -> dict:
+    """
+    Revoke the caller's tokens so they can no longer be used.
+    """
+    tokens = [token] + ([body.refresh_token] if body else [])
+    for raw_token in tokens:
+        try:
+            payload = token_verifier.decode(raw_token)
+        except JWTError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        await revoke_token(payload)
+    return {"message": "Logged out successfully"}
 
 @auth_router.post(
     "/register",
@@ -91,21 +158,7 @@ async def register_user(
     """
     Register a new user in the system.
     """
-    existing_user_by_username = await mongodb.get_user(user.username)
-    if existing_user_by_username:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered"
-        )
-    
-    existing_user_by_email = await mongodb.get_user_by_email(user.email)
-    if existing_user_by_email:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash(user.password)
     user_data = {
         "username": user.username,
         "email": user.email,
@@ -114,95 +167,142 @@ async def register_user(
         "is_superuser": False
     }
     
-    result = await mongodb.create_user(user_data)
-    return User(username=user.username, email=user.email, disabled=False)
-
-if ACTIVATE_OAUTH2 and ACTIVATE_GITHUB:
-    @auth_router.get(
-        '/github-login',
-        summary="GitHub OAuth Login",
-        description="Initiates the GitHub OAuth2 authentication flow by redirecting to GitHub's authorization page.",
-        response_description="Redirects user to GitHub's authorization page."
-    )
-    @limiter.limit('1/second')
-    async def github_login(request: Request) -> RedirectResponse:
-        """
-        Initiate GitHub OAuth login flow.
-        """
-        return RedirectResponse(
-            f'https://github.com/login/oauth/authorize?client_id={GITHUB_CLIENT_ID}', 
-            status_code=302
+    try:
+        await mongodb.create_user(user_data)
+    except DuplicateUserError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=DUPLICATE_USER_DETAILS[e.field]
         )
+    audit_log.record("register", user.username, request)
+    return ModelResponse(User(username=user.username, email=user.email, disabled=False))
+
+@auth_router.get(
+    "/jwks.json",
+    summary="JSON Web Key Set",
+    description="Publishes the public keys used to sign access tokens when an asymmetric algorithm is configured.",
+    response_description="Returns the public signing keys in JWKS format (empty for HMAC algorithms)."
+)
+async def jwks() -> dict:
+    """
+    Expose public signing keys so other services can verify tokens locally.
+    """
+    return token_verifier.public_jwks()
 
-    @auth_router.get(
-        '/github-code',
-        summary="GitHub OAuth Callback",
-        description="Handles the GitHub OAuth2 callback, exchanges the code for an access token, and creates/updates user account.",
-        response_description="Returns a JWT access token for the authenticated GitHub user."
+# Provider routes are always registered; these dependencies check the
+# feature flags per request, so a disabled provider answers 404.
+def require_github(settings: Settings = Depends(get_app_settings)) -> Settings:
+    if not (settings.activate_oauth2 and settings.activate_github):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return settings
+
+def require_microsoft(settings: Settings = Depends(get_app_settings)) -> Settings:
+    if not (settings.activate_oauth2 and settings.activate_microsoft):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return settings
+
+@auth_router.get(
+    '/github-login',
+    summary="GitHub OAuth Login",
+    description="Initiates the GitHub OAuth2 authentication flow by redirecting to GitHub's authorization page.",
+    response_description="Redirects user to GitHub's authorization page."
+)
+@limiter.limit('1/second')
+async def github_login(
+    request: Request,
+    settings: Settings = Depends(require_github)
+) -> RedirectResponse:
+    """
+    Initiate GitHub OAuth login flow.
+    """
+    return RedirectResponse(
+        f'https://github.com/login/oauth/authorize?client_id={settings.github_client_id}', 
+        status_code=302
     )
-    @limiter.limit('1/second')
-    async def github_code(
-        request: Request,
-        code: str
-    ) -> dict:
-        """
-        Handle GitHub OAuth callback and authenticate user.
-        """
-        token_params = {
-            'client_id': GITHUB_CLIENT_ID,
-            'client_secret': GITHUB_CLIENT_SECRET,
-            'code': code
-        }
-        headers = {'Accept': 'application/json'}
-        
-        async with httpx.AsyncClient() as client:
-            token_response = await client.post(
-                url='https://github.com/login/oauth/access_token',
-                params=token_params,
-                headers=headers
-            )
-        
+
+@auth_router.get(
+    '/github-code',
+    summary="GitHub OAuth Callback",
+    description="Handles the GitHub OAuth2 callback, exchanges the code for an access token, and creates/updates user account.",
+    response_description="Returns a JWT access token for the authenticated GitHub user."
+)
+@limiter.limit('1/second')
+async def github_code(
+    request: Request,
+    code: str,
+    settings: Settings = Depends(require_github)
+) -> dict:
+    """
+    Handle GitHub OAuth callback and authenticate user.
+    """
+    token_params = {
+        'client_id': settings.github_client_id,
+        'client_secret': settings.github_client_secret,
+        'code': code
+    }
+    headers = {'Accept': 'application/json'}
+
+    try:
+        token_response = await outbound_http.post(
+            'https://github.com/login/oauth/access_token',
+            params=token_params,
+            headers=headers
+        )
+
         token_data = token_response.json()
         access_token = token_data.get('access_token')
         if not access_token:
             raise HTTPException(status_code=400, detail="Failed to fetch access token from GitHub")
 
         headers.update({'Authorization': f'Bearer {access_token}'})
-        async with httpx.AsyncClient() as client:
-            user_response = await client.get(
-                url='https://api.github.com/user',
-                headers=headers
-            )
-        github_user_data = user_response.json()
-
-        email = github_user_data.get("email")
-        username = github_user_data.get("login")
-
-        existing_user = await mongodb.get_user_by_username(username)
-        if not existing_user:
-            new_user_data = {
-                "username": username,
-                "email": email,
-                "hashed_password": None,
-                "disabled": False
-            }
-            await mongodb.create_user(new_user_data)
-            user = new_user_data
-        else:
-            user = existing_user
+        user_response = await outbound_http.get(
+            'https://api.github.com/user',
+            headers=headers
+        )
+    except httpx.HTTPError:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="GitHub is unavailable, please retry later"
+        )
+    github_user_data = user_response.json()
 
-        token_data = {"sub": user["username"]}
-        jwt_token = create_access_token(token_data)
+    email = github_user_data.get("email")
+    username = github_user_data.get("login")
 
-        return {"access_token": jwt_token, "token_type": "bearer"}
-    
-if ACTIVATE_OAUTH2 and ACTIVATE_MICROSOFT:
-    @auth_router.get(
-        '/microsoft-login',
-        summary="Microsoft OAuth Login",
-        description="Initiates the Microsoft OAuth2 authentication flow by redirecting to Microsoft's authorization page.",
-        response_description="Redirects user to Microsoft's authorization page."
+    existing_user = await mongodb.get_user_by_username(
+        username, PROFILE_PROJECTION
     )
-    @limiter.limit('1/second')
-    def microsoft_login(request: Request) -> RedirectResponse:
-        pass
\ No newline at end of file
+    if not existing_user:
+        new_user_data = {
+            "username": username,
+            "email": email,
+            "hashed_password": None,
+            "disabled": False
+        }
+        try:
+            await mongodb.create_user(new_user_data)
+        except DuplicateUserError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=DUPLICATE_USER_DETAILS[e.field]
+            )
+        user = new_user_data
+        audit_log.record("register", username, request, provider="github")
+    else:
+        user = existing_user
+
+    audit_log.record("login", user["username"], request, provider="github")
+    return create_token_pair(user["username"])
+
+@auth_router.get(
+    '/microsoft-login',
+    summary="Microsoft OAuth Login",
+    description="Initiates the Microsoft OAuth2 authentication flow by redirecting to Microsoft's authorization page.",
+    response_description="Redirects user to Microsoft's authorization page."
+)
+@limiter.limit('1/second')
+def microsoft_login(
+    request: Request,
+    settings: Settings = Depends(require_microsoft)
+) -> RedirectResponse:
+    pass
\ No newline at end of file
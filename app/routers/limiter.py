@@ -1,4 +1,52 @@
-from slowapi import Limiter
+from fastapi import Request
+from limits.storage import storage_from_string
+from limits.strategies import STRATEGIES
+from slowapi import Limiter, _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
+from utils.metrics import rate_limit_rejections
+from utils.auth_utils import decode_access_token
+from utils.config import Settings
 
-limiter = Limiter(key_func=get_remote_address)
\ No newline at end of file
+def get_rate_limit_key(request: Request) -> str:
+    """
+    Authenticated requests are limited per user (JWT `sub`) so users behind
+    a shared NAT don't throttle each other; anonymous requests per client IP.
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        payload = decode_access_token(token)
+        if payload and payload.get("sub"):
+            return f"user:{payload['sub']}"
+    return f"ip:{get_remote_address(request)}"
+
+# Decorated routes hold on to this instance from import; `configure` points
+# it at the configured storage.
+limiter = Limiter(key_func=get_rate_limit_key, in_memory_fallback_enabled=True)
+
+def configure(settings: Settings) -> None:
+    """
+    slowapi only takes its storage and strategy in the constructor, so
+    they are replaced on the instance the routes were decorated with.
+    Limits are checked synchronously, so each check is a blocking Redis
+    round trip on the event loop; the socket timeouts bound how long a
+    stalled Redis can block it before the in-memory fallback takes over.
+    """
+    if settings.rate_limit_strategy not in STRATEGIES:
+        raise ValueError(f'Unknown rate limit strategy "{settings.rate_limit_strategy}"')
+    strategy = STRATEGIES[settings.rate_limit_strategy]
+    limiter._storage_uri = settings.rate_limit_storage_uri
+    limiter._storage = storage_from_string(
+        settings.rate_limit_storage_uri,
+        socket_timeout=settings.redis_socket_timeout,
+        socket_connect_timeout=settings.redis_socket_connect_timeout
+    )
+    limiter._limiter = strategy(limiter._storage)
+    limiter._fallback_limiter = strategy(limiter._fallback_storage)
+    limiter._key_prefix = settings.rate_limit_key_prefix
+    limiter._storage_dead = False
+
+def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    route = request.scope.get("route")
+    rate_limit_rejections.inc(getattr(route, "path", "unmatched"))
+    return _rate_limit_exceeded_handler(request, exc)
@@ -4,6 +4,10 @@ from typing import Optional
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     username: Optional[str | None] = None
@@ -15,9 +19,18 @@ class User(BaseModel):
     is_superuser: Optional[bool | None] = False
 
 class UserInDB(User):
+    id: Optional[str] = None
     hashed_password: str
+    version: int = 0
+
+class UserPage(BaseModel):
+    users: list[dict]
+    next_cursor: Optional[str] = None
 
 class UserCreate(BaseModel):
     username: str
     email: str
-    password: str
\ No newline at end of file
+    password: str
+
+class UserImport(UserCreate):
+    email: EmailStr
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Request
+import time
+import orjson
+from fastapi import APIRouter, Request, Response, status
 from routers.limiter import limiter
-from datetime import datetime
+from utils.health import health_checker
+from utils.responses import ORJSONResponse
 
 app_health = APIRouter(
     prefix="/health",
@@ -16,6 +19,25 @@ app_about = APIRouter(
 async def health_check(request: Request):
     return {"message": "Server is running :) !"}
 
+# Probes are not rate limited: load balancers poll them from few addresses.
+@app_health.get("/live")
+async def liveness():
+    """The process is up and serving its event loop; dependencies are not checked."""
+    return {"status": "ok"}
+
+@app_health.get("/ready")
+async def readiness():
+    """
+    Ready once startup warm-up has finished and both MongoDB and Redis answer
+    a ping. Results are cached briefly; 503 while not ready.
+    """
+    ready, result = await health_checker.readiness()
+    return ORJSONResponse(
+        result,
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Cache-Control": "no-store"}
+    )
+
 
 # The following properties are required:
 # • client.host indicates the IP address of the client performing the HTTP request
@@ -34,7 +56,7 @@ about_dict = {
         "host": "127.0.0.1"
     },
     "server": {
-        "current_time": datetime.now().timestamp(),
+        "current_time": 0,
         "services": [
             {
                 "name": "Service 1",
@@ -59,7 +81,20 @@ about_dict = {
         ]
     }
 }
+
+# Everything except client.host and server.current_time is static, so the
+# services list is serialized once and the dynamic fields are spliced in.
+_about_services = orjson.dumps(about_dict["server"]["services"])
+
+def render_about(host: str, current_time: float) -> bytes:
+    return b"".join((
+        b'{"client":{"host":', orjson.dumps(host),
+        b'},"server":{"current_time":', orjson.dumps(current_time),
+        b',"services":', _about_services, b"}}"
+    ))
+
 @app_about.get("/about.json")
 @limiter.limit('1/second')
 async def about(request: Request):
-    return about_dict
\ No newline at end of file
+    host = request.client.host if request.client else about_dict["client"]["host"]
+    return Response(render_about(host, time.time()), media_type="application/json")
\ No newline at end of file
@@ -0,0 +1,48 @@
+import glob
+import os
+import uvicorn
+from utils.config import Settings, get_settings
+
+def _available(module: str) -> bool:
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+def _clear_metrics_snapshots(settings: Settings) -> None:
+    # Snapshots from a previous run would otherwise be summed into /metrics.
+    if settings.metrics_dir:
+        for path in glob.glob(os.path.join(settings.metrics_dir, "metrics-*.json")):
+            os.remove(path)
+
+def main() -> None:
+    """
+    Production entry point: one uvicorn worker per CPU by default, uvloop and
+    httptools when installed. On SIGTERM each worker first fails its
+    readiness probe for SERVER_DRAIN_DELAY seconds while still serving; then
+    uvicorn stops accepting connections, waits up to SERVER_GRACEFUL_SHUTDOWN
+    seconds for in-flight requests and runs the lifespan shutdown, which
+    closes the Mongo and Redis pools.
+    """
+    settings = get_settings()
+    _clear_metrics_snapshots(settings)
+    uvicorn.run(
+        "main:create_app",
+        factory=True,
+        host=settings.server_host,
+        port=settings.server_port,
+        workers=settings.server_workers,
+        loop="uvloop" if _available("uvloop") else "asyncio",
+        http="httptools" if _available("httptools") else "h11",
+        backlog=settings.server_backlog,
+        timeout_keep_alive=settings.server_keep_alive,
+        limit_concurrency=settings.server_limit_concurrency,
+        timeout_graceful_shutdown=settings.server_graceful_shutdown,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.server_forwarded_allow_ips,
+        access_log=False
+    )
+
+if __name__ == "__main__":
+    main()
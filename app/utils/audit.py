@@ -0,0 +1,177 @@
+import asyncio
+import contextlib
+import logging
+from datetime import datetime, timezone
+from fastapi import Request
+from db.mongo import Mongo
+from utils.auth_utils import mongodb
+from utils.config import Settings
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Queued by `stop` behind the pending events; the writer exits when it reads it.
+_STOP = object()
+
+class AuditLog():
+    """
+    In-process pipeline for audit events. `record` only appends to a
+    bounded queue, so request handlers never wait on Mongo; a background
+    writer inserts the events with one unordered insert_many per batch of
+    `batch_size` events, or every `flush_interval` seconds when traffic is
+    low. When the queue is full new events are dropped and counted rather
+    than slowing requests down. `stop` lets the writer drain the queue.
+    """
+
+    def __init__(
+        self,
+        mongo: Mongo,
+        collection: str = "audit_log",
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0
+    ):
+        self.mongo = mongo
+        self.configure(collection, max_queue, batch_size, flush_interval)
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    def configure(
+        self,
+        collection: str = "audit_log",
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0
+    ) -> None:
+        """Set the pipeline options; the queue size takes effect at the next `start`."""
+        self.collection_name = collection
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def record(self, event: str, username: str | None, request: Request | None = None, **details) -> None:
+        if self._queue is None:
+            self.dropped += 1
+            return
+        document = {
+            "event": event,
+            "username": username,
+            "at": datetime.now(timezone.utc),
+            "ip": request.client.host if request is not None and request.client else None,
+        }
+        if details:
+            document["details"] = details
+        try:
+            self._queue.put_nowait(document)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            # Logged once per thousand drops to keep the log readable.
+            if self.dropped % 1000 == 1:
+                logger.warning("Audit queue full, %d events dropped so far", self.dropped)
+
+    async def _write(self, batch: list[dict]) -> None:
+        try:
+            await self.mongo.db[self.collection_name].insert_many(batch, ordered=False)
+            self.written += len(batch)
+        except asyncio.CancelledError:
+            self.failed += len(batch)
+            raise
+        except Exception:
+            self.failed += len(batch)
+            logger.warning("Failed to write %d audit events", len(batch), exc_info=True)
+
+    async def _next_batch(self) -> tuple[list[dict], bool]:
+        """
+        Wait for the next batch: up to `batch_size` events, or what arrived
+        within `flush_interval` of the first one. The flag is False once the
+        stop marker was read.
+        """
+        event = await self._queue.get()
+        if event is _STOP:
+            return [], False
+        batch = [event]
+        try:
+            # Unlike wait_for on 3.11, a timeout block never swallows a
+            # cancellation that races an item arriving.
+            async with asyncio.timeout(self.flush_interval):
+                while len(batch) < self.batch_size:
+                    event = await self._queue.get()
+                    if event is _STOP:
+                        return batch, False
+                    batch.append(event)
+        except TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            self.dropped += len(batch)
+            raise
+        return batch, True
+
+    async def _run(self) -> None:
+        running = True
+        while running:
+            batch, running = await self._next_batch()
+            if batch:
+                await self._write(batch)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """
+        Queue a stop marker behind the pending events and wait for the
+        writer to write them and exit. If that takes longer than `timeout`
+        (e.g. Mongo is unreachable), the writer is cancelled and the events
+        still queued are counted as dropped, so shutdown always completes.
+        """
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        try:
+            async with asyncio.timeout(timeout):
+                await self._queue.put(_STOP)
+                await asyncio.shield(task)
+        except TimeoutError:
+            task.cancel()
+            # Let the writer unwind its insert before the Mongo client closes.
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+            logger.warning("Audit log not flushed within %.1f s", timeout)
+        # Whatever is left was recorded after the stop marker, or never
+        # reached the writer before the timeout.
+        queue, self._queue = self._queue, None
+        while not queue.empty():
+            if queue.get_nowait() is not _STOP:
+                self.dropped += 1
+
+audit_log = AuditLog(mongodb)
+
+def configure(settings: Settings) -> None:
+    audit_log.configure(
+        settings.mongo_collection_name_audit,
+        max_queue=settings.audit_max_queue,
+        batch_size=settings.audit_batch_size,
+        flush_interval=settings.audit_flush_interval
+    )
+
+registry.callback(
+    "audit_events_total", "Audit events by outcome", "counter",
+    lambda: {
+        ("written",): audit_log.written,
+        ("dropped",): audit_log.dropped,
+        ("failed",): audit_log.failed,
+    },
+    ("outcome",)
+)
+registry.callback(
+    "audit_queue_depth", "Audit events waiting to be written", "gauge",
+    lambda: {(): audit_log.pending}
+)
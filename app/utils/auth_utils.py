@@ -1,38 +1,210 @@
+import asyncio
+import logging
+import uuid
 from datetime import datetime, timedelta
+from functools import partial
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from jose import JWTError
+from redis.exceptions import RedisError
 from routers.models import TokenData, UserInDB, User
-from utils.config import (
-    SECRET_KEY, ALGORITHM, 
-    ACCESS_TOKEN_EXPIRE_MINUTES,
-    MONGO_DB_NAME, MONGO_COLLECTION_NAME_USER
-)
-from db.mongo import Mongo
+from utils.config import Settings
+from utils.hash_policy import HashPolicy
+from utils.password_hasher import PasswordHasher
+from utils.principal_cache import PrincipalCache
+from utils.cache import cache_invalidator
+from utils.tokens import TokenVerifier, load_signing_keys
+from utils.revocation import RevocationList
+from utils.metrics import registry, timed_stage
+from utils.batch_loader import BatchLoader
+from db.mongo import Mongo, available_compressors
+from db.monitoring import CommandStats, PoolStats
+from db.redis_pool import redis_pool
 
-mongodb = Mongo(MONGO_DB_NAME, MONGO_COLLECTION_NAME_USER)
+mongo_pool_stats = PoolStats()
+mongo_command_stats = CommandStats()
+mongodb = Mongo()
+password_hasher = PasswordHasher()
+principal_cache = PrincipalCache(invalidator=cache_invalidator)
+# Every worker drops the cached principals of a user who changed.
+cache_invalidator.subscribe("user", principal_cache.invalidate)
+cache_invalidator.on_reset(principal_cache.clear)
+mongodb.add_change_listener(partial(cache_invalidator.publish, "user"))
+user_loader = BatchLoader("user", mongodb.get_users)
+mongodb.add_change_listener(user_loader.clear)
+token_verifier = TokenVerifier()
+revocation_list = RevocationList(redis_pool)
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
-async def main():
-    await mongodb.create_db(MONGO_DB_NAME)
-    await mongodb.create_collection(MONGO_COLLECTION_NAME_USER)
+logger = logging.getLogger(__name__)
 
-password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
+# Token lifetimes; set by `configure`.
+settings: Settings | None = None
+
+def configure(new_settings: Settings) -> None:
+    """Apply `new_settings` to the singletons above and the token lifetimes."""
+    global settings
+    settings = new_settings
+    mongodb.configure(
+        settings.mongo_connection_string,
+        settings.mongo_db_name,
+        settings.mongo_collection_name_user,
+        client_options={
+            "maxPoolSize": settings.mongo_max_pool_size,
+            "minPoolSize": settings.mongo_min_pool_size,
+            "maxIdleTimeMS": settings.mongo_max_idle_time_ms,
+            "waitQueueTimeoutMS": settings.mongo_wait_queue_timeout_ms,
+            "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+            "connectTimeoutMS": settings.mongo_connect_timeout_ms,
+            "compressors": available_compressors(settings.mongo_compressors),
+            "event_listeners": [mongo_pool_stats, mongo_command_stats],
+        },
+        profile_read_preference=settings.mongo_profile_read_preference,
+        profile_read_concern=settings.mongo_profile_read_concern
+    )
+    password_hasher.configure(
+        HashPolicy(
+            schemes=tuple(scheme.strip() for scheme in settings.password_schemes.split(",") if scheme.strip()),
+            bcrypt_rounds=settings.password_bcrypt_rounds,
+            argon2_time_cost=settings.password_argon2_time_cost,
+            argon2_memory_cost=settings.password_argon2_memory_cost,
+            argon2_parallelism=settings.password_argon2_parallelism
+        ),
+        executor=settings.password_hash_executor,
+        max_workers=settings.password_hash_workers,
+        max_queue=settings.password_hash_max_queue
+    )
+    principal_cache.configure(maxsize=settings.principal_cache_size, ttl=settings.principal_cache_ttl)
+    user_loader.configure(
+        max_batch_size=settings.user_loader_max_batch_size,
+        window=settings.user_loader_window_ms / 1000
+    )
+    token_verifier.configure(
+        load_signing_keys(
+            algorithm=settings.algorithm,
+            active_kid=settings.jwt_active_kid,
+            secret_key=settings.secret_key,
+            private_key=settings.jwt_private_key,
+            public_key=settings.jwt_public_key,
+            verification_keys=settings.jwt_verification_keys
+        ),
+        active_kid=settings.jwt_active_kid,
+        cache_size=settings.token_cache_size
+    )
+    revocation_list.configure(backend=settings.revocation_backend)
+password_rehashes = registry.counter(
+    "password_rehashes_total", "Hashes upgraded to the current policy on login", ("outcome",)
+)
+_background_tasks: set[asyncio.Task] = set()
+
+registry.callback(
+    "in_process_cache_requests_total", "In-process cache lookups by result", "counter",
+    lambda: {
+        ("principal", "hit"): principal_cache.hits,
+        ("principal", "miss"): principal_cache.misses,
+        ("token", "hit"): token_verifier.hits,
+        ("token", "miss"): token_verifier.misses,
+    },
+    ("cache", "result")
+)
+registry.callback(
+    "mongo_pool_connections", "Mongo connections by state", "gauge",
+    lambda: {
+        ("open",): mongo_pool_stats.open,
+        ("in_use",): mongo_pool_stats.in_use,
+    },
+    ("state",)
+)
+registry.callback(
+    "mongo_pool_checkouts_total", "Mongo connection checkouts by result", "counter",
+    lambda: {
+        ("ok",): mongo_pool_stats.checkouts,
+        ("failed",): mongo_pool_stats.checkout_failures,
+    },
+    ("result",)
+)
+registry.callback(
+    "mongo_pool_checkout_wait_seconds_total", "Time spent waiting for a pooled Mongo connection", "counter",
+    lambda: {(): mongo_pool_stats.checkout_wait_seconds}
+)
+registry.callback(
+    "mongo_pool_max_checkout_wait_seconds", "Longest wait for a pooled Mongo connection", "gauge",
+    lambda: {(): mongo_pool_stats.max_checkout_wait_seconds}
+)
+registry.callback(
+    "mongo_pool_clears_total", "Times a Mongo pool was cleared after errors", "counter",
+    lambda: {(): mongo_pool_stats.pool_clears}
+)
+registry.callback(
+    "mongo_commands_total", "Mongo commands by name and outcome", "counter",
+    lambda: {
+        (name, outcome): value
+        for name, (count, failures, _) in mongo_command_stats.snapshot().items()
+        for outcome, value in (("ok", count - failures), ("failed", failures))
+    },
+    ("command", "outcome")
+)
+registry.callback(
+    "mongo_command_seconds_total", "Server round-trip time of Mongo commands", "counter",
+    lambda: {(name,): seconds for name, (_, _, seconds) in mongo_command_stats.snapshot().items()},
+    ("command",)
+)
+registry.callback(
+    "batch_loader_requests_total", "Batch loader lookups, by whether they joined a pending lookup", "counter",
+    lambda: {
+        ("user", "deduplicated"): user_loader.deduplicated,
+        ("user", "queued"): user_loader.requests - user_loader.deduplicated,
+    },
+    ("loader", "outcome")
+)
+registry.callback(
+    "batch_loader_batches_total", "Backend queries issued by batch loaders", "counter",
+    lambda: {("user",): user_loader.batches},
+    ("loader",)
+)
+registry.callback(
+    "password_hash_jobs_total", "Password hashing jobs by outcome", "counter",
+    lambda: {
+        ("completed",): password_hasher.stats.completed,
+        ("rejected",): password_hasher.stats.rejected,
+    },
+    ("outcome",)
+)
+registry.callback(
+    "password_hash_pending", "Password hashing jobs queued or running", "gauge",
+    lambda: {(): password_hasher.pending}
+)
 
-def verify_password(plain_password, hashed_password):
-    return password_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password, hashed_password):
+    return await password_hasher.verify(plain_password, hashed_password)
 
-def get_password_hash(password):
-    return password_context.hash(password)
+async def get_password_hash(password):
+    return await password_hasher.hash(password)
+
+async def _store_rehash(username: str, old_hash: str, new_hash: str) -> None:
+    try:
+        # Conditional on the old hash so a concurrent password change wins.
+        stored = await mongodb.update_user(
+            username, {"hashed_password": new_hash}, expected={"hashed_password": old_hash}
+        )
+        password_rehashes.inc("stored" if stored else "skipped")
+    except Exception:
+        password_rehashes.inc("failed")
+        logger.warning("Failed to store the rehashed password of %s", username, exc_info=True)
 
 async def authenticate_user(username: str, password: str):
-    user = await mongodb.get_user(username)
+    user = await user_loader.load(username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+    if not valid:
         return False
+    if new_hash is not None:
+        # Written back in the background so the login does not wait for it.
+        task = asyncio.create_task(_store_rehash(user.username, user.hashed_password, new_hash))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
     return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -40,14 +212,51 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     if expires_delta:
         expire = datetime.now() + expires_delta
     else:
-        expire = datetime.now() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+        expire = datetime.now() + timedelta(minutes=settings.access_token_expire_minutes)
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex, "type": "access"})
+    encoded_jwt = token_verifier.encode(to_encode)
     return encoded_jwt
 
+def create_refresh_token(username: str):
+    expire = datetime.now() + timedelta(days=settings.refresh_token_expire_days)
+    return token_verifier.encode({
+        "sub": username,
+        "exp": expire,
+        "jti": uuid.uuid4().hex,
+        "type": "refresh"
+    })
+
+def create_token_pair(username: str) -> dict:
+    return {
+        "access_token": create_access_token(
+            data={"sub": username},
+            expires_delta=timedelta(minutes=settings.access_token_expire_minutes)
+        ),
+        "refresh_token": create_refresh_token(username),
+        "token_type": "bearer"
+    }
+
+async def revoke_token(payload: dict) -> bool:
+    """
+    Revoke the token's `jti`. If Redis is unreachable the caller gets a 503:
+    a logout or refresh must not report success for a token still valid.
+    """
+    jti = payload.get("jti")
+    if jti is None:
+        return False
+    try:
+        return await revocation_list.revoke(jti, payload.get("exp", 0))
+    except RedisError:
+        logger.warning("Failed to revoke token %s", jti, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Token revocation is unavailable, please retry",
+            headers={"Retry-After": "1"},
+        )
+
 def decode_access_token(token: str):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithm=[ALGORITHM])
+        payload = token_verifier.decode(token)
         return payload
     except JWTError:
         return None
@@ -58,22 +267,32 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
                 detail="Could not validate credentials", 
                 headers={"WWW-Authenticate": "Bearer"}
         )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        
-        if username is None:
+    with timed_stage("auth"):
+        try:
+            payload = token_verifier.decode(token)
+            username: str = payload.get("sub")
+            
+            if username is None or payload.get("type") == "refresh":
+                raise credentials_exception
+            
+            token_data = TokenData(username=username)
+        except JWTError:
             raise credentials_exception
-        
-        token_data = TokenData(username=username)
-    except JWTError:
-        raise credentials_exception
+
+        if "jti" in payload and await revocation_list.is_revoked(payload["jti"]):
+            raise credentials_exception
+
+    cached_user = principal_cache.get(token)
+    if cached_user is not None:
+        return cached_user
     
-    user = await mongodb.get_user(username=token_data.username)
+    generation = principal_cache.generation(token_data.username)
+    user = await user_loader.load(token_data.username)
     
     if user is None:
         raise credentials_exception
     
+    principal_cache.set(token, user, expires_at=payload.get("exp", float("inf")), generation=generation)
     return user
 
 async def get_current_active_user(current_user: UserInDB = Depends(get_current_user)):
@@ -81,4 +300,11 @@ async def get_current_active_user(current_user: UserInDB = Depends(get_current_u
     if current_user.disabled:
         raise HTTPException(status_code=400, detail="Invalid user")
 
-    return current_user
\ No newline at end of file
+    return current_user
+
+async def get_current_superuser(current_user: UserInDB = Depends(get_current_active_user)):
+
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Superuser privileges required")
+
+    return current_user
@@ -0,0 +1,99 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+from utils.metrics import registry
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+batch_size_histogram = registry.histogram(
+    "batch_loader_batch_size", "Distinct keys per batched lookup", ("loader",),
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+
+class BatchLoader(Generic[K, V]):
+    """
+    DataLoader-style coalescing of lookups. `load(key)` calls made in the
+    same event-loop tick (or within `window` seconds) are combined into one
+    `load_many(keys)` call, at most `max_batch_size` keys each, and a key
+    that is already queued or in flight shares the pending result instead
+    of being looked up again. `load_many` returns {key: value}; keys it
+    leaves out resolve to None.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        load_many: Callable[[list[K]], Awaitable[dict[K, V]]],
+        max_batch_size: int = 100,
+        window: float = 0.0
+    ):
+        self.name = name
+        self.load_many = load_many
+        self.configure(max_batch_size, window)
+        self.requests = 0
+        self.deduplicated = 0
+        self.batches = 0
+        self._queue: dict[K, asyncio.Future] = {}
+        self._inflight: dict[K, asyncio.Future] = {}
+        self._scheduled: asyncio.Handle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def configure(self, max_batch_size: int = 100, window: float = 0.0) -> None:
+        self.max_batch_size = max_batch_size
+        self.window = window
+
+    async def load(self, key: K) -> V | None:
+        self.requests += 1
+        future = self._queue.get(key) or self._inflight.get(key)
+        if future is not None:
+            self.deduplicated += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._queue[key] = future
+            if len(self._queue) >= self.max_batch_size:
+                self._dispatch()
+            elif self._scheduled is None:
+                loop = asyncio.get_running_loop()
+                if self.window > 0:
+                    self._scheduled = loop.call_later(self.window, self._dispatch)
+                else:
+                    self._scheduled = loop.call_soon(self._dispatch)
+        # Shielded so one cancelled caller does not cancel the others' result.
+        return await asyncio.shield(future)
+
+    def clear(self, key: K) -> None:
+        """
+        Forget an in-flight lookup (e.g. after the record changed) so later
+        calls start a fresh one; callers already waiting keep their result.
+        """
+        self._inflight.pop(key, None)
+
+    def _dispatch(self) -> None:
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+            self._scheduled = None
+        if not self._queue:
+            return
+        batch, self._queue = self._queue, {}
+        self._inflight.update(batch)
+        self.batches += 1
+        batch_size_histogram.observe(len(batch), self.name)
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: dict[K, asyncio.Future]) -> None:
+        try:
+            results = await self.load_many(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for key, future in batch.items():
+                if not future.done():
+                    future.set_result(results.get(key))
+        finally:
+            for key, future in batch.items():
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import uuid
+from typing import Callable
+import orjson
+from redis.exceptions import RedisError
+from db.redis_pool import RedisPool, redis_pool
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+class CacheInvalidator():
+    """
+    Broadcasts cache invalidations to every worker over Redis pub/sub.
+    Handlers subscribed to a namespace run locally on `publish` and on each
+    worker when the message arrives. Reset handlers run whenever the
+    subscription is (re)established, since messages may have been missed.
+    """
+
+    def __init__(self, pool: RedisPool, channel: str = INVALIDATION_CHANNEL):
+        self.pool = pool
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self.connected = False
+        self._handlers: dict[str, list[Callable[[str], None]]] = {}
+        self._reset_handlers: list[Callable[[], None]] = []
+        self._task: asyncio.Task | None = None
+
+    def subscribe(self, namespace: str, handler: Callable[[str], None]) -> None:
+        self._handlers.setdefault(namespace, []).append(handler)
+
+    def on_reset(self, handler: Callable[[], None]) -> None:
+        self._reset_handlers.append(handler)
+
+    def _dispatch(self, namespace: str, key: str) -> None:
+        for handler in self._handlers.get(namespace, ()):
+            handler(key)
+
+    def _reset(self) -> None:
+        for handler in self._reset_handlers:
+            handler()
+
+    async def publish(self, namespace: str, key: str) -> None:
+        self._dispatch(namespace, key)
+        message = orjson.dumps({"origin": self.origin, "namespace": namespace, "key": key})
+        try:
+            await self.pool.client().publish(self.channel, message)
+        except RedisError:
+            logger.warning("Failed to broadcast invalidation for %s:%s", namespace, key, exc_info=True)
+
+    async def _listen(self) -> None:
+        backoff = 0.1
+        while True:
+            pubsub = self.pool.subscriber().pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                self._reset()
+                self.connected = True
+                backoff = 0.1
+                async for message in pubsub.listen():
+                    try:
+                        payload = orjson.loads(message["data"])
+                    except orjson.JSONDecodeError:
+                        logger.warning("Ignoring malformed invalidation message %r", message["data"])
+                        continue
+                    if payload["origin"] != self.origin:
+                        self._dispatch(payload["namespace"], payload["key"])
+            except (RedisError, OSError):
+                logger.warning("Cache invalidation subscription lost, retrying", exc_info=True)
+            finally:
+                self.connected = False
+                self._reset()
+                await pubsub.aclose()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 5.0)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+cache_invalidator = CacheInvalidator(redis_pool)
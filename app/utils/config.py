@@ -1,71 +1,152 @@
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-SECRET_KEY = os.environ.get('SECRET_KEY') or None
-if SECRET_KEY is None:
-    raise ValueError('No SECRET_KEY set for FastAPI application')
-
-ALGORITHM = os.environ.get('ALGORITHM')
-if ALGORITHM is None:
-    raise ValueError('No ALGORITHM set for FastAPI application')
-
-ACCESS_TOKEN_EXPIRE_MINUTES = os.environ.get('ACCESS_TOKEN_EXPIRE_MINUTES')
-if ACCESS_TOKEN_EXPIRE_MINUTES is None:
-    raise ValueError('No ACCESS_TOKEN_EXPIRE_MINUTES set for FastAPI application')
-
-MONGO_CONNECTION_STRING = os.environ.get('MONGO_CONNECTION_STRING')
-if MONGO_CONNECTION_STRING is None:
-    raise ValueError('No MONGO_CONNECTION_STRING set for FastAPI application')
-
-MONGO_DB_NAME = os.environ.get('MONGO_DB_NAME')
-if MONGO_DB_NAME is None:
-    raise ValueError('No MONGO_DB_NAME set for FastAPI application')
-
-MONGO_COLLECTION_NAME_USER = os.environ.get('MONGO_COLLECTION_NAME_USER')
-if MONGO_COLLECTION_NAME_USER is None:
-    raise ValueError('No MONGO_DB_COLLECTION set for FastAPI application')
-
-GITHUB_CLIENT_ID = os.environ.get('GITHUB_CLIENT_ID')
-if GITHUB_CLIENT_ID is None:
-    raise ValueError('No GITHUB_CLIENT_ID set for FastAPI application')
-
-GITHUB_CLIENT_SECRET = os.environ.get('GITHUB_CLIENT_SECRET')
-if GITHUB_CLIENT_SECRET is None:
-    raise ValueError('No GITHUB_CLIENT_SECRET set for FastAPI application')
-
-ACTIVATE_OAUTH2 = os.environ.get('ACTIVATE_OAUTH2')
-if ACTIVATE_OAUTH2 is None:
-    raise ValueError('No ACTIVATE_OAUTH2 set for FastAPI application')
-
-if ACTIVATE_OAUTH2 == 'True':
-    ACTIVATE_OAUTH2 = True
-elif ACTIVATE_OAUTH2 == 'False':
-    ACTIVATE_OAUTH2 = False
-
-ACTIVATE_GITHUB = os.environ.get('ACTIVATE_GITHUB')
-if ACTIVATE_GITHUB is None:
-    raise ValueError('No ACTIVATE_GITHUB set for FastAPI application')
-
-if ACTIVATE_GITHUB == 'True':
-    ACTIVATE_GITHUB = True
-elif ACTIVATE_GITHUB == 'False':
-    ACTIVATE_GITHUB = False
-    
-ACTIVATE_MICROSOFT = os.environ.get('ACTIVATE_MICROSOFT')
-if ACTIVATE_MICROSOFT is None:
-    raise ValueError('No ACTIVATE_MICROSOFT set for FastAPI application')
-
-if ACTIVATE_MICROSOFT == 'True':
-    ACTIVATE_MICROSOFT = True
-elif ACTIVATE_MICROSOFT == 'False':
-    ACTIVATE_MICROSOFT = False
-    
-REDIS_HOST = os.environ.get('REDIS_HOST')
-if REDIS_HOST is None:
-    raise ValueError('No REDIS_HOST set for FastAPI application')
-
-REDIS_PORT = os.environ.get('REDIS_PORT')
-if REDIS_PORT is None:
-    raise ValueError('No REDIS_PORT set for FastAPI application')
\ No newline at end of file
+from functools import lru_cache
+from pathlib import Path
+from typing import Literal, Optional
+from fastapi import Request
+from pydantic import model_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+# The repository root .env (what load_dotenv used to find), then one in the
+# working directory. Real environment variables take precedence over both.
+ENV_FILES = (Path(__file__).resolve().parents[2] / ".env", ".env")
+
+class Settings(BaseSettings):
+    """
+    Typed application settings read from the environment and .env files.
+    Field names match the environment variables case-insensitively; empty
+    values fall back to the default. Booleans accept true/false, 1/0,
+    yes/no and on/off, and anything else is a validation error.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=ENV_FILES,
+        env_ignore_empty=True,
+        extra="ignore"
+    )
+
+    secret_key: str
+    algorithm: str
+    access_token_expire_minutes: int
+    refresh_token_expire_days: int = 7
+    jwt_active_kid: str = "default"
+    jwt_private_key: Optional[str] = None
+    jwt_public_key: Optional[str] = None
+    jwt_verification_keys: Optional[str] = None
+    token_cache_size: int = 10000
+    revocation_backend: Literal["redis", "memory"] = "redis"
+
+    mongo_connection_string: str
+    mongo_db_name: str
+    mongo_collection_name_user: str
+    mongo_ensure_indexes: bool = True
+    mongo_collection_name_audit: str = "audit_log"
+    mongo_max_pool_size: int = 50
+    mongo_min_pool_size: int = 4
+    mongo_max_idle_time_ms: int = 300000
+    mongo_wait_queue_timeout_ms: int = 2000
+    mongo_server_selection_timeout_ms: int = 3000
+    mongo_connect_timeout_ms: int = 3000
+    # Only the ones whose Python module is installed are used.
+    mongo_compressors: str = "zstd,snappy,zlib"
+    mongo_profile_read_preference: Literal[
+        "primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest"
+    ] = "primary"
+    mongo_profile_read_concern: Optional[Literal["local", "available", "majority"]] = "local"
+
+    github_client_id: str
+    github_client_secret: str
+    activate_oauth2: bool
+    activate_github: bool
+    activate_microsoft: bool
+
+    redis_host: str
+    redis_port: int
+    redis_max_connections: int = 50
+    redis_socket_timeout: float = 1.0
+    redis_socket_connect_timeout: float = 1.0
+    redis_health_check_interval: int = 30
+
+    # Defaults to the Redis server above.
+    rate_limit_storage_uri: Optional[str] = None
+    rate_limit_strategy: str = "sliding-window-counter"
+    rate_limit_key_prefix: str = "ratelimit"
+
+    password_hash_executor: Literal["thread", "process"] = "thread"
+    password_hash_workers: int = os.cpu_count() or 1
+    password_hash_max_queue: int = 64
+    # New hashes use the first scheme; hashes in the others, or with another
+    # cost, are rehashed on login. Calibrate with `python -m utils.hash_policy`.
+    password_schemes: str = "bcrypt"
+    password_bcrypt_rounds: int = 12
+    password_argon2_time_cost: int = 2
+    password_argon2_memory_cost: int = 19456
+    password_argon2_parallelism: int = 1
+
+    # Concurrent get_user lookups are coalesced into one $in query.
+    user_loader_max_batch_size: int = 100
+    user_loader_window_ms: float = 0.0
+
+    principal_cache_size: int = 10000
+    principal_cache_ttl: float = 60
+
+    outbound_http2: bool = False
+    outbound_connect_timeout: float = 3.0
+    outbound_read_timeout: float = 10.0
+    outbound_max_connections: int = 100
+    outbound_max_keepalive: int = 20
+    outbound_max_per_host: int = 20
+    outbound_retries: int = 2
+    outbound_retry_backoff: float = 0.2
+
+    # Shared directory for per-worker metric snapshots; unset for a single worker.
+    metrics_dir: Optional[str] = None
+    metrics_flush_interval: float = 5.0
+
+    server_host: str = "0.0.0.0"
+    server_port: int = 8080
+    server_workers: int = os.cpu_count() or 1
+    server_backlog: int = 2048
+    server_keep_alive: int = 5
+    server_limit_concurrency: Optional[int] = None
+    server_graceful_shutdown: int = 30
+    # Seconds a worker keeps serving with readiness failing after SIGTERM.
+    server_drain_delay: float = 5.0
+    server_forwarded_allow_ips: str = "127.0.0.1"
+
+    admin_import_batch_size: int = 500
+    admin_import_max_line_bytes: int = 16384
+    admin_export_batch_size: int = 1000
+
+    readiness_timeout: float = 1.0
+    readiness_cache_ttl: float = 2.0
+    warmup_connections: int = 4
+
+    audit_max_queue: int = 10000
+    audit_batch_size: int = 500
+    audit_flush_interval: float = 1.0
+    audit_shutdown_timeout: float = 5.0
+
+    # "brotli" needs the optional brotli-asgi package and falls back to gzip.
+    compression: Literal["gzip", "brotli", "off"] = "gzip"
+    compression_minimum_size: int = 500
+    compression_level: int = 5
+    etag_max_body_size: int = 262144
+
+    @model_validator(mode="after")
+    def _default_rate_limit_storage(self):
+        if self.rate_limit_storage_uri is None:
+            self.rate_limit_storage_uri = f"redis://{self.redis_host}:{self.redis_port}"
+        return self
+
+@lru_cache
+def get_settings() -> Settings:
+    """
+    Settings read from the environment and .env files, validated once and
+    cached. `main.create_app` configures the application from them unless
+    it is passed a Settings instance, e.g. one built by a test.
+    """
+    return Settings()
+
+def get_app_settings(request: Request) -> Settings:
+    """Dependency returning the Settings the running app was created with."""
+    return request.app.state.settings
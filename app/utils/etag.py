@@ -0,0 +1,87 @@
+from hashlib import blake2b
+from starlette.datastructures import Headers
+
+def weak_etag(*parts: str | bytes) -> str:
+    """Weak ETag over the given parts: a short blake2b digest."""
+    digest = blake2b(digest_size=12)
+    for part in parts:
+        digest.update(part.encode() if isinstance(part, str) else part)
+        digest.update(b"\x00")
+    return f'W/"{digest.hexdigest()}"'
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of `etag` against an If-None-Match header value."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+class ETagMiddleware():
+    """
+    Pure ASGI middleware for conditional GETs. Successful GET responses
+    get a weak ETag, either the one the route already set or one computed
+    from the body, and a matching `If-None-Match` is answered with an empty
+    304. Routes that can derive their ETag cheaply (see `/users/me`) answer
+    304 themselves before doing any work; this middleware covers the rest
+    and saves the bandwidth. Streaming and larger bodies pass through.
+    """
+
+    def __init__(self, app, max_size: int = 256 * 1024):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start_message = None
+        passthrough = False
+
+        async def send_with_etag(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                if message["status"] != 200:
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = Headers(raw=start_message["headers"])
+            if message.get("more_body", False) or len(body) > self.max_size:
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            etag = headers.get("etag") or weak_etag(body)
+            raw_headers = [
+                (name, value) for name, value in start_message["headers"] if name != b"etag"
+            ]
+            raw_headers.append((b"etag", etag.encode()))
+            if etag_matches(if_none_match, etag):
+                raw_headers = [
+                    (name, value) for name, value in raw_headers
+                    if name not in (b"content-length", b"content-type")
+                ]
+                await send({**start_message, "status": 304, "headers": raw_headers})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send({**start_message, "headers": raw_headers})
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
@@ -0,0 +1,98 @@
+"""
+Password hash policy: which schemes are accepted, which one new hashes use
+and at what cost. The first scheme hashes new passwords; the others are
+still verified but marked deprecated, as are hashes whose cost differs from
+the configured one, so they are rehashed on the next successful login.
+
+Pick costs for the current CPU with the calibration command, which prints
+the settings to put in .env:
+
+    cd app && python -m utils.hash_policy --target-ms 250
+    cd app && python -m utils.hash_policy --scheme argon2 --target-ms 250
+"""
+import argparse
+import statistics
+import time
+from dataclasses import dataclass, replace
+from passlib.context import CryptContext
+from passlib.hash import argon2, bcrypt
+
+SUPPORTED_SCHEMES = {"bcrypt": bcrypt, "argon2": argon2}
+
+@dataclass
+class HashPolicy:
+    schemes: tuple[str, ...] = ("bcrypt",)
+    bcrypt_rounds: int = 12
+    argon2_time_cost: int = 2
+    argon2_memory_cost: int = 19456
+    argon2_parallelism: int = 1
+
+    def context(self) -> CryptContext:
+        for scheme in self.schemes:
+            if scheme not in SUPPORTED_SCHEMES:
+                raise ValueError(f'Unsupported password scheme "{scheme}", use bcrypt or argon2')
+            if not SUPPORTED_SCHEMES[scheme].has_backend():
+                raise ValueError(f'Password scheme "{scheme}" has no backend installed')
+        return CryptContext(
+            schemes=list(self.schemes),
+            deprecated="auto",
+            # min == max, so hashes with a lower or a higher cost both get
+            # rehashed: cost can be lowered for throughput as well as raised.
+            bcrypt__rounds=self.bcrypt_rounds,
+            bcrypt__min_rounds=self.bcrypt_rounds,
+            bcrypt__max_rounds=self.bcrypt_rounds,
+            # argon2 flags any hash whose parameters differ on its own.
+            argon2__type="ID",
+            argon2__time_cost=self.argon2_time_cost,
+            argon2__memory_cost=self.argon2_memory_cost,
+            argon2__parallelism=self.argon2_parallelism
+        )
+
+def measure_verify(context: CryptContext, samples: int = 3) -> float:
+    """Median seconds for one verify with `context`'s default scheme."""
+    hashed = context.hash("calibration-password")
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.verify("calibration-password", hashed)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def calibrate(scheme: str, target: float, policy: HashPolicy) -> tuple[HashPolicy, float]:
+    """
+    Raise the cost parameter (bcrypt rounds or argon2 time cost) until one
+    verify takes at least `target` seconds, then keep whichever of the last
+    two settings is closer to the target.
+    """
+    field, lowest, highest = ("bcrypt_rounds", 4, 20) if scheme == "bcrypt" else ("argon2_time_cost", 1, 50)
+    previous = None
+    for cost in range(lowest, highest + 1):
+        candidate = replace(policy, schemes=(scheme,), **{field: cost})
+        elapsed = measure_verify(candidate.context())
+        if elapsed >= target:
+            if previous and target - previous[1] < elapsed - target:
+                return previous
+            return candidate, elapsed
+        previous = (candidate, elapsed)
+    return previous
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scheme", choices=sorted(SUPPORTED_SCHEMES), default="bcrypt")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="target time for one verify")
+    parser.add_argument("--memory-cost", type=int, default=HashPolicy.argon2_memory_cost, help="argon2 memory in KiB")
+    parser.add_argument("--parallelism", type=int, default=HashPolicy.argon2_parallelism, help="argon2 lanes")
+    args = parser.parse_args()
+
+    base = HashPolicy(argon2_memory_cost=args.memory_cost, argon2_parallelism=args.parallelism)
+    policy, elapsed = calibrate(args.scheme, args.target_ms / 1000, base)
+    print(f"# {args.scheme}: {elapsed * 1000:.1f} ms per verify on this CPU (target {args.target_ms:.0f} ms)")
+    if args.scheme == "bcrypt":
+        print(f"PASSWORD_BCRYPT_ROUNDS={policy.bcrypt_rounds}")
+    else:
+        print(f"PASSWORD_ARGON2_TIME_COST={policy.argon2_time_cost}")
+        print(f"PASSWORD_ARGON2_MEMORY_COST={policy.argon2_memory_cost}")
+        print(f"PASSWORD_ARGON2_PARALLELISM={policy.argon2_parallelism}")
+
+if __name__ == "__main__":
+    main()
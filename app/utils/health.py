@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import signal
+import threading
+import time
+from db.mongo import Mongo
+from db.redis_pool import RedisPool, redis_pool
+from utils.auth_utils import mongodb
+from utils.config import Settings
+
+logger = logging.getLogger(__name__)
+
+class HealthChecker():
+    """
+    Readiness of this worker's dependencies. Mongo and Redis are pinged
+    concurrently, each bounded by `timeout`, and the result is cached for
+    `cache_ttl` seconds; concurrent probes share one in-flight check, so a
+    probe storm costs at most one ping per dependency per interval.
+
+    The worker only reports ready between `warm_up` at startup and
+    `mark_stopping`, which `install_drain_handler` calls as soon as SIGTERM
+    arrives, while the worker is still serving, so the load balancer stops
+    routing to it before uvicorn shuts down.
+    """
+
+    def __init__(self, mongo: Mongo, pool: RedisPool, timeout: float = 1.0, cache_ttl: float = 2.0):
+        self.mongo = mongo
+        self.pool = pool
+        self.configure(timeout, cache_ttl)
+        self.started = False
+        self.stopping = False
+        self._result: dict | None = None
+        self._checked_at = 0.0
+        self._inflight: asyncio.Task | None = None
+
+    def configure(self, timeout: float = 1.0, cache_ttl: float = 2.0) -> None:
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+
+    async def _ping_mongo(self) -> None:
+        await self.mongo.client.admin.command("ping")
+
+    async def _ping_redis(self) -> None:
+        await self.pool.client().ping()
+
+    async def _timed_check(self, ping) -> dict:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(ping(), self.timeout)
+        except Exception as e:
+            reason = "timeout" if isinstance(e, asyncio.TimeoutError) else type(e).__name__
+            return {"status": "down", "error": reason}
+        return {"status": "up", "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    async def _run_checks(self) -> dict:
+        mongo, redis = await asyncio.gather(
+            self._timed_check(self._ping_mongo),
+            self._timed_check(self._ping_redis)
+        )
+        healthy = mongo["status"] == "up" and redis["status"] == "up"
+        self._result = {
+            "status": "ok" if healthy else "unavailable",
+            "checks": {"mongo": mongo, "redis": redis}
+        }
+        self._checked_at = time.monotonic()
+        return self._result
+
+    async def check(self) -> dict:
+        if self._result is not None and time.monotonic() - self._checked_at < self.cache_ttl:
+            return self._result
+        if self._inflight is None:
+            self._inflight = asyncio.create_task(self._run_checks())
+            self._inflight.add_done_callback(self._clear_inflight)
+        return await asyncio.shield(self._inflight)
+
+    def _clear_inflight(self, task: asyncio.Task) -> None:
+        if self._inflight is task:
+            self._inflight = None
+
+    async def readiness(self) -> tuple[bool, dict]:
+        if not self.started:
+            return False, {"status": "stopping" if self.stopping else "starting"}
+        result = await self.check()
+        return result["status"] == "ok", result
+
+    async def warm_up(self, connections: int = 1) -> None:
+        """
+        Open `connections` pooled connections to Mongo and Redis up front
+        (concurrent pings each check out their own connection), so the first
+        requests don't pay for connection setup, then start reporting ready.
+        Failures are logged; readiness keeps reporting them until they clear.
+        """
+        pings = [self._timed_check(ping) for ping in (self._ping_mongo, self._ping_redis) for _ in range(connections)]
+        results = await asyncio.gather(*pings)
+        for result in results:
+            if result["status"] != "up":
+                logger.warning("Warm-up ping failed: %s", result["error"])
+                break
+        await self._run_checks()
+        self.started = True
+
+    def mark_stopping(self) -> None:
+        self.started = False
+        self.stopping = True
+
+    def install_drain_handler(self, delay: float) -> None:
+        """
+        Wrap the current SIGTERM handler (uvicorn's): on SIGTERM, report
+        "stopping" at once and pass the signal on `delay` seconds later,
+        giving load balancers time to see the failing probe while requests
+        are still served. A second SIGTERM is passed on immediately. Signal
+        handlers can only be set from the main thread; elsewhere (e.g. the
+        test client) this does nothing.
+        """
+        if delay <= 0 or threading.current_thread() is not threading.main_thread():
+            return
+        previous = signal.getsignal(signal.SIGTERM)
+        if not callable(previous):
+            return
+        loop = asyncio.get_running_loop()
+
+        def handle_sigterm(sig, frame):
+            if self.stopping:
+                previous(sig, frame)
+                return
+            self.mark_stopping()
+            logger.info("SIGTERM received, draining for %.1f s before shutting down", delay)
+            loop.call_soon_threadsafe(loop.call_later, delay, previous, sig, frame)
+
+        signal.signal(signal.SIGTERM, handle_sigterm)
+
+health_checker = HealthChecker(mongodb, redis_pool)
+
+def configure(settings: Settings) -> None:
+    health_checker.configure(timeout=settings.readiness_timeout, cache_ttl=settings.readiness_cache_ttl)
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import random
+from urllib.parse import urlsplit
+import httpx
+from utils.config import Settings
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUS_CODES = frozenset({502, 503, 504})
+
+class OutboundHTTP():
+    """
+    Application-scoped httpx.AsyncClient for calls to OAuth providers and
+    other upstreams. Connections are kept alive between requests, each host
+    gets at most `max_per_host` concurrent requests, and idempotent calls
+    are retried with exponential backoff. Pass an `httpx.MockTransport` to
+    `start` to run without network access.
+    """
+
+    def __init__(
+        self,
+        http2: bool = False,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 10.0,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        max_per_host: int = 20,
+        retries: int = 2,
+        retry_backoff: float = 0.2
+    ):
+        self._client: httpx.AsyncClient | None = None
+        self.configure(
+            http2, connect_timeout, read_timeout, max_connections,
+            max_keepalive, max_per_host, retries, retry_backoff
+        )
+
+    def configure(
+        self,
+        http2: bool = False,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 10.0,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        max_per_host: int = 20,
+        retries: int = 2,
+        retry_backoff: float = 0.2
+    ) -> None:
+        """Set the client options; takes effect at the next `start`."""
+        self.http2 = http2
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive
+        )
+        self.max_per_host = max_per_host
+        self._host_slots: dict[str, asyncio.Semaphore] = {}
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+
+    def start(self, transport: httpx.AsyncBaseTransport | None = None) -> None:
+        if self._client is not None:
+            return
+        http2 = self.http2 and HTTP2_AVAILABLE
+        if self.http2 and not HTTP2_AVAILABLE:
+            logger.warning("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+        self._client = httpx.AsyncClient(
+            http2=http2,
+            timeout=self.timeout,
+            limits=self.limits,
+            transport=transport
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError("Outbound HTTP client is not started")
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _slots(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        slots = self._host_slots.get(host)
+        if slots is None:
+            slots = self._host_slots[host] = asyncio.Semaphore(self.max_per_host)
+        return slots
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        method = method.upper()
+        attempts = 1 + (self.retries if method in IDEMPOTENT_METHODS else 0)
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            try:
+                async with self._slots(url):
+                    response = await self.client.request(method, url, **kwargs)
+                if response.status_code not in RETRY_STATUS_CODES or last_attempt:
+                    return response
+            except httpx.TransportError:
+                if last_attempt:
+                    raise
+            delay = self.retry_backoff * (2 ** attempt)
+            await asyncio.sleep(delay + random.uniform(0, delay))
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+outbound_http = OutboundHTTP()
+
+def configure(settings: Settings) -> None:
+    outbound_http.configure(
+        http2=settings.outbound_http2,
+        connect_timeout=settings.outbound_connect_timeout,
+        read_timeout=settings.outbound_read_timeout,
+        max_connections=settings.outbound_max_connections,
+        max_keepalive=settings.outbound_max_keepalive,
+        max_per_host=settings.outbound_max_per_host,
+        retries=settings.outbound_retries,
+        retry_backoff=settings.outbound_retry_backoff
+    )
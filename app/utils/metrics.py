@@ -0,0 +1,355 @@
+import asyncio
+import glob
+import logging
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Iterable
+
+import orjson
+from utils.config import Settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# Per-request stage durations for the Server-Timing header. The middleware
+# installs a fresh dict per request; code anywhere below it adds to it.
+_request_timings: ContextVar[dict[str, float] | None] = ContextVar("request_timings", default=None)
+
+def record_stage(stage: str, seconds: float) -> None:
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+@contextmanager
+def timed_stage(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+def _label_key(labels: tuple) -> str:
+    return "\x00".join(labels)
+
+def _format_labels(labelnames: Iterable[str], key: str, extra: str = "") -> str:
+    values = key.split("\x00") if key else []
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter():
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.values: dict[str, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        key = _label_key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def snapshot(self) -> dict:
+        return {"samples": dict(self.values)}
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        self.values[_label_key(labels)] = value
+
+class CallbackMetric():
+    """
+    Metric whose samples are read from existing stats (cache hit counters,
+    hasher stats, ...) at collection time, so hot paths pay nothing.
+    """
+
+    def __init__(self, name: str, help: str, kind: str, callback: Callable[[], dict[tuple, float]], labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = labelnames
+        self.callback = callback
+
+    def snapshot(self) -> dict:
+        return {"samples": {_label_key(labels): value for labels, value in self.callback().items()}}
+
+class Histogram():
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self.counts: dict[str, list[int]] = {}
+        self.sums: dict[str, float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = _label_key(labels)
+        counts = self.counts.get(key)
+        if counts is None:
+            counts = self.counts[key] = [0] * (len(self.buckets) + 1)
+            self.sums[key] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[key] += value
+
+    def snapshot(self) -> dict:
+        return {
+            "buckets": list(self.buckets),
+            "counts": {key: list(counts) for key, counts in self.counts.items()},
+            "sums": dict(self.sums),
+        }
+
+def _pid_alive(pid: int) -> bool:
+    # Signal 0 only checks for existence; on Windows os.kill would terminate
+    # the process, so there staleness relies on the snapshot age alone.
+    if os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class MetricsRegistry():
+    """
+    Per-worker metrics. Updates are plain dict operations on the event loop
+    thread, so there are no locks on the request path. When `directory` is
+    set, every worker periodically writes a snapshot there and `/metrics`
+    sums the snapshots of the live workers. A snapshot whose process has
+    exited, or that was not rewritten for `stale_after` seconds (three
+    flush intervals by default), is deleted instead of summed, so restarted
+    workers do not leave their counters and gauges behind.
+    """
+
+    def __init__(self, directory: str | None = None, flush_interval: float = 5.0, stale_after: float | None = None):
+        self.metrics: dict[str, object] = {}
+        self._task: asyncio.Task | None = None
+        self.configure(directory, flush_interval, stale_after)
+
+    def configure(self, directory: str | None = None, flush_interval: float = 5.0, stale_after: float | None = None) -> None:
+        """Set the snapshot options; takes effect at the next `start`."""
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.stale_after = stale_after if stale_after is not None else 3 * flush_interval
+
+    def _register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: tuple = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: tuple = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name: str, help: str, kind: str, callback, labelnames: tuple = ()) -> CallbackMetric:
+        return self._register(CallbackMetric(name, help, kind, callback, labelnames))
+
+    def snapshot(self) -> dict:
+        return {
+            name: {
+                "kind": metric.kind,
+                "help": metric.help,
+                "labelnames": list(metric.labelnames),
+                **metric.snapshot()
+            }
+            for name, metric in self.metrics.items()
+        }
+
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.directory, f"metrics-{os.getpid()}.json")
+
+    def write_snapshot(self) -> None:
+        path = self._snapshot_path()
+        with open(f"{path}.tmp", "wb") as snapshot_file:
+            snapshot_file.write(orjson.dumps(self.snapshot()))
+        os.replace(f"{path}.tmp", path)
+
+    def _is_stale(self, path: str) -> bool:
+        pid = os.path.basename(path)[len("metrics-"):-len(".json")]
+        if not pid.isdigit():
+            return True
+        if int(pid) == os.getpid():
+            return False
+        try:
+            if time.time() - os.path.getmtime(path) > self.stale_after:
+                return True
+        except OSError:
+            return True
+        return not _pid_alive(int(pid))
+
+    def _collect(self) -> dict:
+        if not self.directory:
+            return self.snapshot()
+        self.write_snapshot()
+        merged: dict = {}
+        for path in glob.glob(os.path.join(self.directory, "metrics-*.json")):
+            if self._is_stale(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                with open(path, "rb") as snapshot_file:
+                    snapshot = orjson.loads(snapshot_file.read())
+            except (OSError, orjson.JSONDecodeError):
+                continue
+            for name, metric in snapshot.items():
+                target = merged.setdefault(name, {**metric, "samples": {}, "counts": {}, "sums": {}})
+                for key, value in metric.get("samples", {}).items():
+                    target["samples"][key] = target["samples"].get(key, 0.0) + value
+                for key, counts in metric.get("counts", {}).items():
+                    current = target["counts"].setdefault(key, [0] * len(counts))
+                    target["counts"][key] = [a + b for a, b in zip(current, counts)]
+                for key, value in metric.get("sums", {}).items():
+                    target["sums"][key] = target["sums"].get(key, 0.0) + value
+        return merged
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        lines = []
+        for name, metric in sorted(self._collect().items()):
+            labelnames = metric["labelnames"]
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['kind']}")
+            if metric["kind"] != "histogram":
+                for key, value in metric["samples"].items():
+                    lines.append(f"{name}{_format_labels(labelnames, key)} {value}")
+                continue
+            buckets = metric["buckets"]
+            for key, counts in metric["counts"].items():
+                cumulative = 0
+                for bound, count in zip(buckets + ["+Inf"], counts):
+                    cumulative += count
+                    le = f'le="{bound}"'
+                    lines.append(f"{name}_bucket{_format_labels(labelnames, key, le)} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labelnames, key)} {metric['sums'][key]}")
+                lines.append(f"{name}_count{_format_labels(labelnames, key)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    async def _flush_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                self.write_snapshot()
+            except OSError:
+                logger.warning("Failed to write metrics snapshot", exc_info=True)
+
+    def start(self) -> None:
+        if self.directory and self._task is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._task = asyncio.create_task(self._flush_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            try:
+                os.remove(self._snapshot_path())
+            except OSError:
+                pass
+
+registry = MetricsRegistry()
+
+def configure(settings: Settings) -> None:
+    registry.configure(directory=settings.metrics_dir, flush_interval=settings.metrics_flush_interval)
+
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"
+)
+rate_limit_rejections = registry.counter(
+    "rate_limit_rejections_total", "Requests rejected by the rate limiter", ("route",)
+)
+mongo_operation_seconds = registry.histogram(
+    "mongo_operation_duration_seconds", "Duration of Mongo repository methods", ("method",)
+)
+
+def instrument_mongo(method):
+    """Time a Mongo repository coroutine method as a `db` stage."""
+    name = method.__name__
+
+    @wraps(method)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            mongo_operation_seconds.observe(elapsed, name)
+            record_stage("db", elapsed)
+    return wrapper
+
+class MetricsMiddleware():
+    """
+    Pure ASGI middleware recording request latency per route template and
+    the in-flight gauge, and emitting a `Server-Timing` header with the
+    time spent in each stage (auth, db, cache, ...) plus the total.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: dict[str, float] = {}
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                total = time.perf_counter() - start
+                entries = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in timings.items()]
+                entries.append(f"total;dur={total * 1000:.2f}")
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", ", ".join(entries).encode())
+                ]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            http_requests_in_flight.dec()
+            _request_timings.reset(token)
+            route = scope.get("route")
+            http_request_seconds.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status_code)
+            )
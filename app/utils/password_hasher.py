@@ -0,0 +1,157 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from fastapi import HTTPException, status
+from utils.hash_policy import HashPolicy
+from utils.metrics import record_stage, registry
+
+hash_queue_seconds = registry.histogram(
+    "password_hash_queue_seconds", "Time password jobs wait for a pool worker"
+)
+hash_seconds = registry.histogram(
+    "password_hash_duration_seconds", "Time spent hashing or verifying a password"
+)
+
+# Context used by the job functions below; `PasswordHasher` sets it in this
+# process and, through the pool initializer, in every pool process.
+password_context = None
+
+def _use_policy(policy: HashPolicy) -> None:
+    global password_context
+    password_context = policy.context()
+
+def _hash(password: str) -> str:
+    return password_context.hash(password)
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return password_context.verify(plain_password, hashed_password)
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return password_context.verify_and_update(plain_password, hashed_password)
+
+@dataclass
+class HasherStats:
+    submitted: int = 0
+    completed: int = 0
+    rejected: int = 0
+    queue_wait_seconds: float = 0.0
+    hash_seconds: float = 0.0
+    max_queue_wait_seconds: float = 0.0
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+class PasswordHasher():
+    """
+    Runs password hashing and verification on a bounded worker pool so the
+    event loop never blocks on password work. When more than `max_queue`
+    jobs are pending, new jobs are rejected with 503 instead of queueing.
+    """
+
+    def __init__(
+        self,
+        policy: HashPolicy | None = None,
+        executor: str = "thread",
+        max_workers: int = 4,
+        max_queue: int = 64
+    ):
+        self.stats = HasherStats()
+        self._pending = 0
+        self._executor: Executor | None = None
+        self.configure(policy, executor, max_workers, max_queue)
+
+    def configure(
+        self,
+        policy: HashPolicy | None = None,
+        executor: str = "thread",
+        max_workers: int = 4,
+        max_queue: int = 64
+    ) -> None:
+        """Set the hash policy and pool options; call before the pool is used."""
+        self.policy = policy or HashPolicy()
+        self.executor_kind = executor
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        _use_policy(self.policy)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_use_policy,
+                    initargs=(self.policy,)
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="password-hasher"
+                )
+        return self._executor
+
+    async def _run(self, func, *args, reject: bool = True):
+        if reject and self._pending >= self.max_queue:
+            self.stats.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry later",
+                headers={"Retry-After": "1"}
+            )
+        self._pending += 1
+        self.stats.submitted += 1
+        loop = asyncio.get_running_loop()
+        submitted_at = time.perf_counter()
+        try:
+            result, hash_time = await loop.run_in_executor(
+                self._get_executor(), _timed, func, *args
+            )
+        finally:
+            self._pending -= 1
+        queue_wait = max(time.perf_counter() - submitted_at - hash_time, 0.0)
+        self.stats.completed += 1
+        self.stats.hash_seconds += hash_time
+        self.stats.queue_wait_seconds += queue_wait
+        self.stats.max_queue_wait_seconds = max(self.stats.max_queue_wait_seconds, queue_wait)
+        hash_queue_seconds.observe(queue_wait)
+        hash_seconds.observe(hash_time)
+        record_stage("hash", queue_wait + hash_time)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(_verify, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """
+        Verify, and if the hash does not match the current policy (old scheme
+        or cost) also return a new hash of the same password, else None.
+        """
+        return await self._run(_verify_and_update, plain_password, hashed_password)
+
+    async def hash_many(self, passwords: list[str], concurrency: int | None = None) -> list[str]:
+        """
+        Hash a batch for bulk jobs. At most `concurrency` jobs (default half
+        the workers) are in the pool at once and they wait instead of being
+        rejected, so a bulk import leaves room for interactive logins.
+        """
+        semaphore = asyncio.Semaphore(concurrency or max(self.max_workers // 2, 1))
+
+        async def hash_one(password: str) -> str:
+            async with semaphore:
+                return await self._run(_hash, password, reject=False)
+
+        return await asyncio.gather(*(hash_one(password) for password in passwords))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
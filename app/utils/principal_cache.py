@@ -0,0 +1,68 @@
+import time
+from typing import Optional
+from routers.models import UserInDB
+from utils.lru import LRUCache
+
+class PrincipalCache():
+    """
+    Caches the user resolved for a bearer token so authenticated requests
+    skip the JWT decode and the MongoDB lookup. Entries never outlive the
+    token's `exp` and are dropped when the user record changes. With an
+    `invalidator`, the cache is only used while it is subscribed, since a
+    worker that is not could miss the change of a user it has cached.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0, invalidator=None):
+        self.invalidator = invalidator
+        self._generations: dict[str, int] = {}
+        # Bumped by `clear`, so a generation read before it never matches again.
+        self._epoch = 0
+        self.configure(maxsize, ttl)
+
+    def configure(self, maxsize: int = 10000, ttl: float = 60.0) -> None:
+        """Resize the cache; the principals cached so far are dropped."""
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.clear()
+
+    @property
+    def hits(self) -> int:
+        return self._cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self._cache.misses
+
+    @property
+    def enabled(self) -> bool:
+        return self.invalidator is None or self.invalidator.connected
+
+    def generation(self, username: str) -> tuple[int, int]:
+        return self._epoch, self._generations.get(username, 0)
+
+    def get(self, token: str) -> Optional[UserInDB]:
+        if not self.enabled:
+            return None
+        entry = self._cache.get(token)
+        if entry is None:
+            return None
+        user, generation = entry
+        if generation != self.generation(user.username):
+            self._cache.pop(token)
+            return None
+        return user
+
+    def set(self, token: str, user: UserInDB, expires_at: float, generation: tuple[int, int]) -> None:
+        """
+        `generation` must be read before the user was fetched so a write
+        that lands during the fetch is not masked by the stale record.
+        """
+        if self.enabled and generation == self.generation(user.username):
+            self._cache.set(token, (user, generation), ttl=expires_at - time.time())
+
+    def invalidate(self, username: str) -> None:
+        self._generations[username] = self._generations.get(username, 0) + 1
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._generations.clear()
+        self._epoch += 1
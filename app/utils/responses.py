@@ -0,0 +1,22 @@
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+class ORJSONResponse(JSONResponse):
+    """Application-wide JSON response rendered with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+class ModelResponse(Response):
+    """
+    Serializes an already validated Pydantic model straight to JSON bytes.
+    Returning it from a route skips FastAPI's response_model revalidation;
+    the declared response_model still documents the route in OpenAPI.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: BaseModel) -> bytes:
+        return content.__pydantic_serializer__.to_json(content)
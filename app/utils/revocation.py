@@ -0,0 +1,63 @@
+import logging
+import time
+from redis.exceptions import RedisError
+from db.redis_pool import RedisPool
+
+logger = logging.getLogger(__name__)
+
+class RevocationList():
+    """
+    Set of revoked token ids (`jti`). Each entry only lives until the token
+    it revokes would have expired anyway, so the set stays small.
+
+    The "redis" backend is shared by all workers and costs one EXISTS per
+    check; the "memory" backend is process-local and only suitable for a
+    single worker. If Redis is unreachable, checks fail open and are logged,
+    while `revoke` raises RedisError so callers never report a failed
+    revocation as done.
+    """
+
+    def __init__(self, pool: RedisPool, backend: str = "redis", prefix: str = "revoked"):
+        self.pool = pool
+        self.prefix = prefix
+        self._local: dict[str, float] = {}
+        self.configure(backend)
+
+    def configure(self, backend: str = "redis") -> None:
+        if backend not in ("redis", "memory"):
+            raise ValueError('Revocation backend must be "redis" or "memory"')
+        self.backend = backend
+
+    def _key(self, jti: str) -> str:
+        return f"{self.prefix}:{jti}"
+
+    def _purge_local(self, now: float) -> None:
+        expired = [jti for jti, expires_at in self._local.items() if expires_at <= now]
+        for jti in expired:
+            del self._local[jti]
+
+    async def revoke(self, jti: str, expires_at: float) -> bool:
+        """
+        Revoke `jti` until `expires_at` (epoch seconds). Returns False if it
+        was already revoked, which lets refresh rotation detect reuse
+        atomically.
+        """
+        now = time.time()
+        ttl = max(int(expires_at - now) + 1, 1)
+        if self.backend == "memory":
+            self._purge_local(now)
+            if jti in self._local:
+                return False
+            self._local[jti] = now + ttl
+            return True
+        return bool(await self.pool.client().set(self._key(jti), 1, ex=ttl, nx=True))
+
+    async def is_revoked(self, jti: str) -> bool:
+        if self.backend == "memory":
+            expires_at = self._local.get(jti)
+            return expires_at is not None and expires_at > time.time()
+        try:
+            return await self.pool.client().exists(self._key(jti)) > 0
+        except RedisError:
+            logger.warning("Revocation check failed for %s", jti, exc_info=True)
+            return False
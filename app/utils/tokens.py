@@ -0,0 +1,119 @@
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Any
+from jose import JWTError, jwk, jwt
+from utils.lru import LRUCache
+
+ASYMMETRIC_PREFIXES = ("RS", "ES", "PS")
+
+@dataclass(frozen=True)
+class SigningKey:
+    kid: str
+    algorithm: str
+    signing_key: str | None
+    verification_key: str
+
+    @property
+    def asymmetric(self) -> bool:
+        return self.algorithm.startswith(ASYMMETRIC_PREFIXES)
+
+def _read_key(value: str) -> str:
+    if value.lstrip().startswith("-----BEGIN"):
+        return value
+    with open(value) as key_file:
+        return key_file.read()
+
+def load_signing_keys(
+    algorithm: str,
+    active_kid: str,
+    secret_key: str,
+    private_key: str | None = None,
+    public_key: str | None = None,
+    verification_keys: str | None = None
+) -> dict[str, SigningKey]:
+    """
+    Build the key ring from configuration. The active key signs new tokens;
+    `verification_keys` ("kid=secret,..." for HMAC, "kid=path.pem,..." for
+    asymmetric algorithms) lists retired keys still accepted until the
+    tokens they signed expire.
+    """
+    asymmetric = algorithm.startswith(ASYMMETRIC_PREFIXES)
+    if asymmetric:
+        if not private_key or not public_key:
+            raise ValueError(f'{algorithm} requires JWT_PRIVATE_KEY and JWT_PUBLIC_KEY')
+        keys = {active_kid: SigningKey(active_kid, algorithm, _read_key(private_key), _read_key(public_key))}
+    else:
+        keys = {active_kid: SigningKey(active_kid, algorithm, secret_key, secret_key)}
+
+    for entry in filter(None, (verification_keys or "").split(",")):
+        kid, _, value = entry.strip().partition("=")
+        if not kid or not value:
+            raise ValueError(f'Invalid JWT_VERIFICATION_KEYS entry "{entry}"')
+        value = _read_key(value) if asymmetric else value
+        keys.setdefault(kid, SigningKey(kid, algorithm, None, value))
+    return keys
+
+class TokenVerifier():
+    """
+    Signs and verifies JWTs against a ring of keys selected by the `kid`
+    header, so signing keys can rotate without invalidating live tokens.
+    Verified claims are kept in an LRU keyed by the token digest until the
+    token's `exp`, so repeat verifications skip the signature check.
+    """
+
+    def __init__(
+        self,
+        keys: dict[str, SigningKey] | None = None,
+        active_kid: str | None = None,
+        cache_size: int = 10000
+    ):
+        self.configure(keys or {}, active_kid, cache_size)
+
+    def configure(self, keys: dict[str, SigningKey], active_kid: str | None, cache_size: int = 10000) -> None:
+        """Replace the key ring; claims verified with the previous ring are forgotten."""
+        if keys and active_kid not in keys:
+            raise ValueError(f'Active JWT key "{active_kid}" is not configured')
+        self.keys = keys
+        self.active_kid = active_kid
+        self._cache = LRUCache(maxsize=cache_size, ttl=float("inf"))
+
+    @property
+    def hits(self) -> int:
+        return self._cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self._cache.misses
+
+    def encode(self, claims: dict[str, Any]) -> str:
+        if not self.keys:
+            raise RuntimeError("No JWT signing key is configured")
+        key = self.keys[self.active_kid]
+        return jwt.encode(
+            claims, key.signing_key, algorithm=key.algorithm, headers={"kid": key.kid}
+        )
+
+    def decode(self, token: str) -> dict[str, Any]:
+        """Return the verified claims of `token` or raise JWTError."""
+        digest = hashlib.blake2b(token.encode(), digest_size=20).digest()
+        claims = self._cache.get(digest)
+        if claims is not None:
+            return claims
+
+        kid = jwt.get_unverified_header(token).get("kid", self.active_kid)
+        key = self.keys.get(kid)
+        if key is None:
+            raise JWTError(f"Unknown signing key {kid}")
+        claims = jwt.decode(token, key.verification_key, algorithms=[key.algorithm])
+        self._cache.set(digest, claims, ttl=claims.get("exp", float("inf")) - time.time())
+        return claims
+
+    def public_jwks(self) -> dict[str, list[dict]]:
+        """Public keys in JWKS form, for services that verify tokens themselves."""
+        keys = []
+        for key in self.keys.values():
+            if key.asymmetric:
+                public = jwk.construct(key.verification_key, key.algorithm).to_dict()
+                keys.append({**public, "kid": key.kid, "use": "sig"})
+        return {"keys": keys}
@@ -0,0 +1,32 @@
+"""
+Environment for benchmarks that import the app in process: puts app/ on
+sys.path and fills in placeholder settings that are not already set.
+"""
+import os
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+
+BENCH_ENV = {
+    "SECRET_KEY": "benchmark-secret",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "MONGO_CONNECTION_STRING": "mongodb://localhost:27017",
+    "MONGO_DB_NAME": "benchmark",
+    "MONGO_COLLECTION_NAME_USER": "users",
+    "MONGO_ENSURE_INDEXES": "False",
+    "GITHUB_CLIENT_ID": "benchmark",
+    "GITHUB_CLIENT_SECRET": "benchmark",
+    "ACTIVATE_OAUTH2": "False",
+    "ACTIVATE_GITHUB": "False",
+    "ACTIVATE_MICROSOFT": "False",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "RATE_LIMIT_STORAGE_URI": "memory://",
+}
+
+def configure() -> None:
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+    for name, value in BENCH_ENV.items():
+        os.environ.setdefault(name, value)
@@ -0,0 +1,169 @@
+"""
+In-process load test for the API routers.
+
+Boots the FastAPI app with mongomock-motor and fakeredis stand-ins (no
+MongoDB or Redis needed), drives the main routes at a configurable
+concurrency through httpx's ASGI transport and reports throughput and
+latency percentiles per route. Results are written as JSON so runs from
+different commits can be compared:
+
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/load_test.py --concurrency 32 --requests 2000 --output before.json
+    ... change something ...
+    python benchmarks/load_test.py --concurrency 32 --requests 2000 --compare before.json
+
+Rate limits are disabled unless --keep-rate-limits is given.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import bench_env
+bench_env.configure()
+
+import fakeredis
+import httpx
+from mongomock_motor import AsyncMongoMockClient
+
+from main import create_app
+from db.migrations import USER_INDEXES
+from db.redis_pool import redis_pool
+from routers.limiter import limiter
+from utils.auth_utils import mongodb
+
+ROUTES = ("register", "token", "users_me", "users_me_304", "health", "ready", "about")
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+def summarize(samples: list[float], statuses: dict[int, int], elapsed: float) -> dict:
+    return {
+        "requests": len(samples),
+        "elapsed_s": round(elapsed, 4),
+        "rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "status": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+async def drive(total: int, concurrency: int, make_request) -> dict:
+    samples: list[float] = []
+    statuses: dict[int, int] = {}
+    counter = iter(range(total))
+
+    async def worker():
+        for index in counter:
+            start = time.perf_counter()
+            response = await make_request(index)
+            samples.append((time.perf_counter() - start) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(samples, statuses, time.perf_counter() - start)
+
+async def run(args) -> dict:
+    app = create_app()
+    mongodb.client = AsyncMongoMockClient()
+    collection = mongodb.client[os.environ["MONGO_DB_NAME"]][os.environ["MONGO_COLLECTION_NAME_USER"]]
+    await collection.create_indexes(USER_INDEXES)
+    mongodb.collection = collection
+    mongodb.db = collection.database
+    redis_pool.connect(fakeredis.aioredis.FakeRedis())
+    limiter.enabled = args.keep_rate_limits
+
+    routes = [route for route in args.routes.split(",") if route]
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            password = "benchmark-password"
+            await client.post("/auth/register", json={
+                "username": "bench", "email": "bench@example.com", "password": password
+            })
+            login = await client.post("/auth/token", data={"username": "bench", "password": password})
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            etag = (await client.get("/api/v1/users/me", headers=headers)).headers.get("etag", "")
+            run_id = int(time.time())
+
+            scenarios = {
+                "register": lambda i: client.post("/auth/register", json={
+                    "username": f"user-{run_id}-{i}",
+                    "email": f"user-{run_id}-{i}@example.com",
+                    "password": password
+                }),
+                "token": lambda i: client.post("/auth/token", data={"username": "bench", "password": password}),
+                "users_me": lambda i: client.get("/api/v1/users/me", headers=headers),
+                "users_me_304": lambda i: client.get("/api/v1/users/me", headers={**headers, "If-None-Match": etag}),
+                "health": lambda i: client.get("/health/"),
+                "ready": lambda i: client.get("/health/ready"),
+                "about": lambda i: client.get("/about.json"),
+            }
+            for route in routes:
+                total = args.requests if route not in ("register", "token") else args.hash_requests
+                results[route] = await drive(total, args.concurrency, scenarios[route])
+                print(format_row(route, results[route]))
+    return results
+
+def format_row(route: str, result: dict, baseline: dict | None = None) -> str:
+    row = (
+        f"{route:<12} {result['requests']:>7} req  {result['rps']:>10.1f} req/s  "
+        f"p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  p99 {result['p99_ms']:>8.2f} ms"
+    )
+    if baseline:
+        change = (result["rps"] - baseline["rps"]) / baseline["rps"] * 100 if baseline["rps"] else 0.0
+        row += f"  ({change:+.1f}% req/s, p99 {baseline['p99_ms']:.2f} -> {result['p99_ms']:.2f} ms)"
+    return row
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=bench_env.APP_DIR, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per cheap route")
+    parser.add_argument("--hash-requests", type=int, default=100, help="requests for /auth/register and /auth/token")
+    parser.add_argument("--routes", default=",".join(ROUTES), help=f"comma separated subset of {','.join(ROUTES)}")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare against")
+    parser.add_argument("--keep-rate-limits", action="store_true")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)["routes"]
+        print(f"\ncompared with {args.compare}:")
+        for route, result in results.items():
+            print(format_row(route, result, baseline.get(route)))
+
+    if args.output:
+        report = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "concurrency": args.concurrency,
+            "routes": results,
+        }
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"\nresults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
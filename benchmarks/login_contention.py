@@ -0,0 +1,77 @@
+"""
+Measures /api/v1/users/me latency while logins run concurrently.
+
+Run against a live server with an existing account:
+
+    python benchmarks/login_contention.py --url http://localhost:8080 \
+        --username johndoe --password secret --logins 8 --duration 10
+
+Compare the p99 with and without concurrent logins (--logins 0) to see how
+much password hashing interferes with the event loop. The routes are rate
+limited per client, so raise the limits when benchmarking or count 429s.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import httpx
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> str:
+    response = await client.post(
+        "/auth/token",
+        data={"username": username, "password": password}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+async def login_loop(client, username, password, deadline, counters):
+    while time.perf_counter() < deadline:
+        response = await client.post(
+            "/auth/token",
+            data={"username": username, "password": password}
+        )
+        counters[response.status_code] = counters.get(response.status_code, 0) + 1
+
+async def me_loop(client, token, deadline, samples):
+    headers = {"Authorization": f"Bearer {token}"}
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await client.get("/api/v1/users/me", headers=headers)
+        samples.append((time.perf_counter() - start) * 1000)
+
+async def run(args) -> None:
+    async with httpx.AsyncClient(base_url=args.url, timeout=30) as client:
+        token = await login(client, args.username, args.password)
+        deadline = time.perf_counter() + args.duration
+        samples: list[float] = []
+        login_status: dict[int, int] = {}
+        tasks = [me_loop(client, token, deadline, samples) for _ in range(args.readers)]
+        tasks += [
+            login_loop(client, args.username, args.password, deadline, login_status)
+            for _ in range(args.logins)
+        ]
+        await asyncio.gather(*tasks)
+
+    print(f"/api/v1/users/me requests: {len(samples)}")
+    if samples:
+        print(f"  mean {statistics.mean(samples):.2f} ms")
+        print(f"  p50  {percentile(samples, 50):.2f} ms")
+        print(f"  p99  {percentile(samples, 99):.2f} ms")
+    print(f"/auth/token status codes: {login_status}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=8, help="concurrent login loops")
+    parser.add_argument("--readers", type=int, default=4, help="concurrent /users/me loops")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    asyncio.run(run(parser.parse_args()))
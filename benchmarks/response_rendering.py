@@ -0,0 +1,44 @@
+"""
+Micro-benchmark of response rendering: FastAPI's default path
+(jsonable_encoder + json.dumps) against orjson and Pydantic's own
+serializer, for a user model and the /about.json payload.
+
+    python benchmarks/response_rendering.py --iterations 50000
+"""
+import argparse
+import json
+import time
+
+import bench_env
+bench_env.configure()
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from routers.models import User
+from routers.other.health import about_dict, render_about
+
+def measure(label: str, iterations: int, func) -> None:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<36} {elapsed / iterations * 1e6:>8.2f} us/op")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50000)
+    args = parser.parse_args()
+
+    user = User(username="bench", email="bench@example.com", disabled=False)
+    about = {**about_dict, "client": {"host": "127.0.0.1"}}
+
+    measure("user: jsonable_encoder + json", args.iterations, lambda: json.dumps(jsonable_encoder(user)).encode())
+    measure("user: orjson(model_dump)", args.iterations, lambda: orjson.dumps(user.model_dump()))
+    measure("user: pydantic to_json", args.iterations, lambda: user.__pydantic_serializer__.to_json(user))
+    measure("about: jsonable_encoder + json", args.iterations, lambda: json.dumps(jsonable_encoder(about)).encode())
+    measure("about: orjson", args.iterations, lambda: orjson.dumps(about))
+    measure("about: precomputed splice", args.iterations, lambda: render_about("127.0.0.1", time.time()))
+
+if __name__ == "__main__":
+    main()
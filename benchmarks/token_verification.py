@@ -0,0 +1,52 @@
+"""
+Compares cold JWT verification (signature check + claim parsing) with the
+cached path of TokenVerifier.
+
+    python benchmarks/token_verification.py --iterations 20000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from utils.tokens import TokenVerifier, load_signing_keys
+
+def bench(label: str, func, iterations: int) -> None:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed / iterations * 1e6:9.2f} us/op")
+
+def main(args) -> None:
+    keys = load_signing_keys(
+        algorithm=args.algorithm,
+        active_kid="bench",
+        secret_key="bench-secret",
+        private_key=args.private_key,
+        public_key=args.public_key
+    )
+    expire = datetime.now(timezone.utc) + timedelta(hours=1)
+    signer = TokenVerifier(keys, active_kid="bench")
+    token = signer.encode({"sub": "johndoe", "exp": expire})
+
+    def cold():
+        TokenVerifier(keys, active_kid="bench", cache_size=1).decode(token)
+
+    cached_verifier = TokenVerifier(keys, active_kid="bench")
+    cached_verifier.decode(token)
+
+    print(f"algorithm {args.algorithm}, {args.iterations} iterations")
+    bench("cold verification", cold, args.iterations)
+    bench("cached verification", lambda: cached_verifier.decode(token), args.iterations)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--algorithm", default="HS256")
+    parser.add_argument("--private-key", help="PEM file for RS/ES algorithms")
+    parser.add_argument("--public-key", help="PEM file for RS/ES algorithms")
+    main(parser.parse_args())
@@ -0,0 +1,85 @@
+"""
+Puts app/ on sys.path, as uvicorn's --app-dir does. The `client` fixture
+runs an app built from the `settings` fixture against mongomock and
+fakeredis; a test module can override `settings` to change them.
+"""
+import os
+import sys
+import pytest
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+
+TEST_SETTINGS = {
+    "secret_key": "test-secret",
+    "algorithm": "HS256",
+    "access_token_expire_minutes": 30,
+    "mongo_connection_string": "mongodb://localhost:27017",
+    "mongo_db_name": "test",
+    "mongo_collection_name_user": "users",
+    "mongo_ensure_indexes": False,
+    "github_client_id": "test",
+    "github_client_secret": "test",
+    "activate_oauth2": False,
+    "activate_github": False,
+    "activate_microsoft": False,
+    "redis_host": "localhost",
+    "redis_port": 6379,
+    "rate_limit_storage_uri": "memory://",
+    "password_bcrypt_rounds": 4,
+}
+
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def settings():
+    from utils.config import Settings
+    return Settings(_env_file=None, **TEST_SETTINGS)
+
+@pytest.fixture
+def client(settings):
+    import asyncio
+    import fakeredis
+    from fastapi.testclient import TestClient
+    from mongomock_motor import AsyncMongoMockClient
+    from main import create_app
+    from db.migrations import USER_INDEXES
+    from db.redis_pool import redis_pool
+    from routers.limiter import limiter
+    from utils.auth_utils import mongodb
+
+    app = create_app(settings)
+    mongodb.client = AsyncMongoMockClient()
+    mongodb.db = mongodb.client["test"]
+    mongodb.collection = mongodb.db["users"]
+    asyncio.run(mongodb.collection.create_indexes(USER_INDEXES))
+    redis_pool.connect(fakeredis.aioredis.FakeRedis())
+    limiter.enabled = False
+    with TestClient(app) as test_client:
+        yield test_client
+
+def login(client, username: str, password: str = "password") -> dict:
+    response = client.post("/auth/token", data={"username": username, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def register(client, username: str, password: str = "password") -> dict:
+    response = client.post(
+        "/auth/register",
+        json={"username": username, "email": f"{username}@example.com", "password": password}
+    )
+    assert response.status_code == 200, response.text
+    return login(client, username, password)
+
+@pytest.fixture
+def superuser_headers(client):
+    import asyncio
+    from utils.auth_utils import mongodb
+
+    register(client, "admin")
+    asyncio.run(mongodb.collection.update_one({"username": "admin"}, {"$set": {"is_superuser": True}}))
+    return login(client, "admin")
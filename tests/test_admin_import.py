@@ -0,0 +1,80 @@
+import asyncio
+import orjson
+import pytest
+from routers.admin.admin import _ndjson_lines
+from utils.auth_utils import mongodb
+
+class StreamedRequest():
+    def __init__(self, *chunks: bytes):
+        self.chunks = chunks
+
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+def lines(*chunks: bytes, max_line_bytes: int = 20) -> list:
+    async def collect():
+        return [line async for line in _ndjson_lines(StreamedRequest(*chunks), max_line_bytes)]
+    return asyncio.run(collect())
+
+def user_line(username: str, padding: int = 0) -> bytes:
+    return orjson.dumps({
+        "username": username,
+        "email": f"{username}@example.com",
+        "password": "password" + "x" * padding
+    })
+
+@pytest.fixture
+def settings(settings):
+    return settings.model_copy(update={"admin_import_max_line_bytes": 200, "admin_import_batch_size": 1})
+
+def test_lines_are_split_across_chunks():
+    assert lines(b'{"a":', b'1}\n{"b"', b':2}') == [(1, b'{"a":1}'), (2, b'{"b":2}')]
+
+def test_complete_oversized_line_is_flagged():
+    assert lines(b"short\n" + b"x" * 30 + b"\nafter\n") == [(1, b"short"), (2, None), (3, b"after")]
+
+def test_oversized_line_split_across_chunks_is_flagged():
+    chunks = (b"short\n" + b"x" * 15, b"x" * 15, b"x" * 15, b"x\nafter")
+    assert lines(*chunks) == [(1, b"short"), (2, None), (3, b"after")]
+
+def test_unterminated_oversized_last_line_is_flagged():
+    assert lines(b"short\n", b"x" * 25) == [(1, b"short"), (2, None)]
+
+def test_line_at_the_limit_is_accepted():
+    assert lines(b"x" * 20 + b"\n") == [(1, b"x" * 20)]
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_import_reports_oversized_lines_and_keeps_the_rest(client, superuser_headers, chunked):
+    body = b"\n".join([user_line("first"), user_line("huge", padding=300), user_line("last")])
+    content = (body[i:i + 64] for i in range(0, len(body), 64)) if chunked else body
+
+    response = client.post("/admin/users/import", content=content, headers=superuser_headers)
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["inserted"] == 2
+    assert report["errors"] == [{"line": 2, "error": "Line is longer than 200 bytes"}]
+    stored = asyncio.run(mongodb.collection.distinct("username"))
+    assert sorted(stored) == ["admin", "first", "last"]
+
+def test_import_reports_invalid_emails(client, superuser_headers):
+    bad = orjson.dumps({"username": "bad", "email": "not-an-email", "password": "password"})
+    body = b"\n".join([user_line("first"), bad])
+
+    response = client.post("/admin/users/import", content=body, headers=superuser_headers)
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["inserted"] == 1
+    assert [error["line"] for error in report["errors"]] == [2]
+    assert "email" in report["errors"][0]["error"]
+    stored = asyncio.run(mongodb.collection.distinct("username"))
+    assert sorted(stored) == ["admin", "first"]
+
+def test_invalid_document_does_not_fail_its_batch(client, superuser_headers):
+    asyncio.run(mongodb.collection.insert_one(
+        {"username": "broken", "email": "not-an-email", "hashed_password": "x"}
+    ))
+    users = asyncio.run(mongodb.get_users(["admin", "broken"]))
+    assert list(users) == ["admin"]
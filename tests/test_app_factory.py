@@ -0,0 +1,26 @@
+from main import create_app
+from routers.limiter import limiter
+from utils.auth_utils import password_hasher, revocation_list, token_verifier
+from utils.health import health_checker
+
+def test_singletons_follow_the_settings_of_the_app(settings):
+    custom = settings.model_copy(update={
+        "jwt_active_kid": "custom",
+        "revocation_backend": "memory",
+        "password_bcrypt_rounds": 5,
+        "readiness_timeout": 0.5,
+        "rate_limit_key_prefix": "custom",
+    })
+
+    app = create_app(custom)
+
+    assert app.state.settings is custom
+    assert token_verifier.active_kid == "custom"
+    assert revocation_list.backend == "memory"
+    assert password_hasher.policy.bcrypt_rounds == 5
+    assert health_checker.timeout == 0.5
+    assert limiter._key_prefix == "custom"
+
+    create_app(settings)
+    assert token_verifier.active_kid == "default"
+    assert revocation_list.backend == "redis"
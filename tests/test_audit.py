@@ -0,0 +1,99 @@
+import asyncio
+import pytest
+from utils.audit import AuditLog
+
+pytestmark = pytest.mark.anyio
+
+class FakeCollection():
+    def __init__(self):
+        self.batches: list[list[dict]] = []
+        self.hang = False
+
+    async def insert_many(self, documents, ordered=True):
+        if self.hang:
+            await asyncio.Event().wait()
+        self.batches.append(list(documents))
+
+    @property
+    def documents(self) -> list[dict]:
+        return [document for batch in self.batches for document in batch]
+
+class FakeMongo():
+    def __init__(self):
+        self.collection = FakeCollection()
+        self.db = {"audit": self.collection}
+
+def audit_log(**options) -> tuple[AuditLog, FakeCollection]:
+    mongo = FakeMongo()
+    return AuditLog(mongo, "audit", **options), mongo.collection
+
+async def test_stop_right_after_record_returns_and_persists():
+    for delay in (None, 0, 0.001, 0.005):
+        for max_queue in (1, 64):
+            log, collection = audit_log(max_queue=max_queue, flush_interval=0.005)
+            log.start()
+            if delay is not None:
+                await asyncio.sleep(delay)
+            log.record("login", "bob")
+            await asyncio.wait_for(log.stop(), 1)
+            assert [event["event"] for event in collection.documents] == ["login"]
+            assert (log.written, log.dropped) == (1, 0)
+
+async def test_events_are_written_in_batches_of_batch_size():
+    log, collection = audit_log(batch_size=10, flush_interval=10)
+    log.start()
+    for i in range(25):
+        log.record("login", f"user{i}")
+    await log.stop()
+    assert [len(batch) for batch in collection.batches] == [10, 10, 5]
+    assert [event["username"] for event in collection.documents] == [f"user{i}" for i in range(25)]
+
+async def test_partial_batch_is_written_after_flush_interval():
+    log, collection = audit_log(batch_size=100, flush_interval=0.02)
+    log.start()
+    log.record("register", "bob", provider="github")
+    await asyncio.sleep(0.1)
+    assert collection.documents[0]["details"] == {"provider": "github"}
+    await log.stop()
+
+async def test_full_queue_drops_instead_of_blocking():
+    log, collection = audit_log(max_queue=3, flush_interval=10)
+    log.start()
+    for i in range(5):
+        log.record("login", f"user{i}")
+    assert log.dropped == 2
+    await log.stop()
+    assert log.written == 3
+
+async def test_stop_gives_up_when_writes_hang():
+    log, collection = audit_log(batch_size=2, flush_interval=10)
+    collection.hang = True
+    log.start()
+    for i in range(5):
+        log.record("login", f"user{i}")
+    writer = log._task
+    await asyncio.wait_for(log.stop(timeout=0.1), 1)
+    assert writer.done()
+    assert log.written == 0
+    assert log.failed + log.dropped == 5
+
+async def test_events_after_stop_are_counted_as_dropped():
+    log, _ = audit_log()
+    log.start()
+    await log.stop()
+    log.record("login", "bob")
+    assert log.dropped == 1
+
+async def test_cancellation_racing_a_new_event_is_not_swallowed():
+    log, collection = audit_log(flush_interval=10)
+    log.start()
+    log.record("login", "first")
+    await asyncio.sleep(0.01)
+    # The writer now waits for a second event. This one arrives in the same
+    # loop iteration as the cancellation.
+    log.record("login", "second")
+    log._task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(log._task, 1)
+    assert log.pending == 1
+    assert log.dropped == 1
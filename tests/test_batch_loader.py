@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+from utils.batch_loader import BatchLoader
+
+pytestmark = pytest.mark.anyio
+
+class Source():
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.calls: list[list[str]] = []
+        self.delay = delay
+        self.fail = fail
+
+    async def load_many(self, keys: list[str]) -> dict[str, str]:
+        self.calls.append(sorted(keys))
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("database down")
+        return {key: key.upper() for key in keys if key != "missing"}
+
+async def test_same_tick_loads_share_one_batch():
+    source = Source()
+    loader = BatchLoader("test", source.load_many)
+    results = await asyncio.gather(*(loader.load(key) for key in ["a", "b", "c"]))
+    assert results == ["A", "B", "C"]
+    assert source.calls == [["a", "b", "c"]]
+    assert loader.batches == 1
+
+async def test_duplicate_keys_are_loaded_once():
+    source = Source()
+    loader = BatchLoader("test", source.load_many)
+    results = await asyncio.gather(*(loader.load("a") for _ in range(5)))
+    assert results == ["A"] * 5
+    assert source.calls == [["a"]]
+    assert (loader.requests, loader.deduplicated) == (5, 4)
+
+async def test_in_flight_key_is_shared_by_later_callers():
+    source = Source(delay=0.05)
+    loader = BatchLoader("test", source.load_many)
+    first = asyncio.create_task(loader.load("a"))
+    await asyncio.sleep(0.01)
+    assert await loader.load("a") == "A"
+    assert await first == "A"
+    assert source.calls == [["a"]]
+
+async def test_clear_starts_a_fresh_lookup():
+    source = Source(delay=0.05)
+    loader = BatchLoader("test", source.load_many)
+    first = asyncio.create_task(loader.load("a"))
+    await asyncio.sleep(0.01)
+    loader.clear("a")
+    await loader.load("a")
+    await first
+    assert source.calls == [["a"], ["a"]]
+
+async def test_batches_are_split_at_max_batch_size():
+    source = Source()
+    loader = BatchLoader("test", source.load_many, max_batch_size=2)
+    await asyncio.gather(*(loader.load(key) for key in ["a", "b", "c", "d", "e"]))
+    assert source.calls == [["a", "b"], ["c", "d"], ["e"]]
+
+async def test_window_collects_loads_from_later_ticks():
+    source = Source()
+    loader = BatchLoader("test", source.load_many, window=0.02)
+
+    async def later(key: str, delay: float) -> str:
+        await asyncio.sleep(delay)
+        return await loader.load(key)
+
+    await asyncio.gather(later("a", 0), later("b", 0.005))
+    assert source.calls == [["a", "b"]]
+
+async def test_missing_keys_resolve_to_none():
+    loader = BatchLoader("test", Source().load_many)
+    assert await asyncio.gather(loader.load("a"), loader.load("missing")) == ["A", None]
+
+async def test_errors_reach_every_caller_and_are_not_cached():
+    source = Source(fail=True)
+    loader = BatchLoader("test", source.load_many)
+    results = await asyncio.gather(loader.load("a"), loader.load("b"), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    source.fail = False
+    assert await loader.load("a") == "A"
+
+async def test_cancelled_caller_does_not_cancel_the_others():
+    source = Source(delay=0.05)
+    loader = BatchLoader("test", source.load_many)
+    cancelled = asyncio.create_task(loader.load("a"))
+    other = asyncio.create_task(loader.load("a"))
+    await asyncio.sleep(0.01)
+    cancelled.cancel()
+    assert await other == "A"
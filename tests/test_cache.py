@@ -0,0 +1,119 @@
+import asyncio
+import fakeredis
+import pytest
+from db.redis_pool import RedisPool
+from routers.models import UserInDB
+from utils.cache import CacheInvalidator
+from utils.principal_cache import PrincipalCache
+
+pytestmark = pytest.mark.anyio
+
+async def wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+def worker(server) -> CacheInvalidator:
+    pool = RedisPool("localhost", 6379)
+    pool.connect(fakeredis.aioredis.FakeRedis(server=server))
+    return CacheInvalidator(pool)
+
+async def test_subscriber_pool_has_no_read_timeout():
+    pool = RedisPool("localhost", 6379, socket_timeout=1.0)
+    pool.connect()
+    try:
+        assert pool.pool.connection_kwargs["socket_timeout"] == 1.0
+        assert pool.subscriber_pool.connection_kwargs["socket_timeout"] is None
+    finally:
+        await pool.close()
+
+async def test_invalidation_reaches_other_workers(server):
+    first = worker(server)
+    second = worker(server)
+    received = []
+    second.subscribe("user", received.append)
+    first.start()
+    second.start()
+    try:
+        await wait_for(lambda: first.connected and second.connected)
+        await first.publish("user", "bob")
+        await wait_for(lambda: received == ["bob"])
+    finally:
+        await first.stop()
+        await second.stop()
+
+async def test_own_messages_are_dispatched_once(server):
+    invalidator = worker(server)
+    received = []
+    invalidator.subscribe("user", received.append)
+    invalidator.start()
+    try:
+        await wait_for(lambda: invalidator.connected)
+        await invalidator.publish("user", "bob")
+        await asyncio.sleep(0.1)
+        assert received == ["bob"]
+    finally:
+        await invalidator.stop()
+
+async def test_reset_handlers_run_on_subscribe_and_on_loss(server):
+    invalidator = worker(server)
+    resets = []
+    invalidator.on_reset(lambda: resets.append(True))
+    invalidator.start()
+    await wait_for(lambda: invalidator.connected)
+    # An idle subscription is not a lost one.
+    await asyncio.sleep(0.2)
+    assert resets == [True]
+
+    await invalidator.stop()
+    assert not invalidator.connected
+    assert len(resets) == 2
+
+def principal_worker(server) -> tuple[CacheInvalidator, PrincipalCache]:
+    invalidator = worker(server)
+    cache = PrincipalCache(maxsize=16, ttl=60, invalidator=invalidator)
+    invalidator.subscribe("user", cache.invalidate)
+    invalidator.on_reset(cache.clear)
+    return invalidator, cache
+
+def cache_bob(cache: PrincipalCache, token: str) -> None:
+    user = UserInDB(username="bob", email="bob@example.com", hashed_password="x")
+    cache.set(token, user, expires_at=float("inf"), generation=cache.generation("bob"))
+
+async def test_principal_cache_is_unused_while_unsubscribed(server):
+    first_invalidator, first = principal_worker(server)
+    second_invalidator, second = principal_worker(server)
+    cache_bob(second, "token")
+    assert second.get("token") is None
+
+    first_invalidator.start()
+    second_invalidator.start()
+    try:
+        await wait_for(lambda: first_invalidator.connected and second_invalidator.connected)
+        cache_bob(second, "token")
+        assert second.get("token").username == "bob"
+
+        await first_invalidator.publish("user", "bob")
+        await wait_for(lambda: second.get("token") is None)
+
+        cache_bob(second, "token")
+        await second_invalidator.stop()
+        assert second.get("token") is None
+        cache_bob(second, "token")
+        assert second.get("token") is None
+    finally:
+        await first_invalidator.stop()
+        await second_invalidator.stop()
+
+def test_generation_read_before_a_reset_is_rejected():
+    cache = PrincipalCache(maxsize=16, ttl=60)
+    user = UserInDB(username="bob", email="bob@example.com", hashed_password="x")
+    generation = cache.generation("bob")
+    cache.clear()
+    cache.set("token", user, expires_at=float("inf"), generation=generation)
+    assert cache.get("token") is None
@@ -0,0 +1,77 @@
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+from utils.etag import ETagMiddleware, etag_matches, weak_etag
+
+def plain(request):
+    return PlainTextResponse("hello")
+
+def tagged(request):
+    return PlainTextResponse("hello", headers={"ETag": 'W/"route"'})
+
+def large(request):
+    return PlainTextResponse("x" * 200)
+
+def missing(request):
+    return PlainTextResponse("missing", status_code=404)
+
+def streamed(request):
+    return StreamingResponse(iter([b"a", b"b"]), media_type="text/plain")
+
+def created(request):
+    return Response("created", status_code=200)
+
+@pytest.fixture
+def client():
+    app = Starlette(routes=[
+        Route("/plain", plain),
+        Route("/tagged", tagged),
+        Route("/large", large),
+        Route("/missing", missing),
+        Route("/streamed", streamed),
+        Route("/created", created, methods=["POST"]),
+    ])
+    app.add_middleware(ETagMiddleware, max_size=100)
+    return TestClient(app)
+
+def test_weak_etag_depends_on_every_part():
+    assert weak_etag("bob", "1") == weak_etag("bob", "1")
+    assert weak_etag("bob", "1") != weak_etag("bob", "2")
+    assert weak_etag("ab", "c") != weak_etag("a", "bc")
+    assert weak_etag(b"body").startswith('W/"')
+
+def test_etag_matches_weak_lists_and_wildcard():
+    assert etag_matches('"abc"', 'W/"abc"')
+    assert etag_matches('W/"x", W/"abc"', 'W/"abc"')
+    assert etag_matches("*", 'W/"abc"')
+    assert not etag_matches('W/"x"', 'W/"abc"')
+    assert not etag_matches(None, 'W/"abc"')
+
+def test_body_etag_and_304(client):
+    response = client.get("/plain")
+    etag = response.headers["etag"]
+    assert etag == weak_etag(b"hello")
+
+    not_modified = client.get("/plain", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+    assert "content-length" not in not_modified.headers
+    assert "content-type" not in not_modified.headers
+
+def test_route_etag_is_kept(client):
+    assert client.get("/tagged").headers["etag"] == 'W/"route"'
+    assert client.get("/tagged", headers={"If-None-Match": 'W/"route"'}).status_code == 304
+
+@pytest.mark.parametrize("path", ["/large", "/missing", "/streamed"])
+def test_uncacheable_responses_pass_through(client, path):
+    response = client.get(path, headers={"If-None-Match": "*"})
+    assert response.status_code != 304
+    assert "etag" not in response.headers
+
+def test_only_get_is_handled(client):
+    response = client.post("/created", headers={"If-None-Match": "*"})
+    assert response.status_code == 200
+    assert "etag" not in response.headers
@@ -0,0 +1,62 @@
+import asyncio
+import os
+import signal
+import pytest
+from utils.health import HealthChecker
+
+pytestmark = pytest.mark.anyio
+
+class FakeMongo():
+    def __init__(self):
+        self.client = self
+        self.admin = self
+
+    async def command(self, name):
+        return {"ok": 1}
+
+class FakeRedisPool():
+    def client(self):
+        return self
+
+    async def ping(self):
+        return True
+
+@pytest.fixture
+def checker():
+    return HealthChecker(FakeMongo(), FakeRedisPool(), timeout=0.5, cache_ttl=0)
+
+@pytest.fixture
+def sigterm_calls():
+    calls = []
+    original = signal.signal(signal.SIGTERM, lambda sig, frame: calls.append(sig))
+    yield calls
+    signal.signal(signal.SIGTERM, original)
+
+async def test_ready_only_between_warm_up_and_stopping(checker):
+    assert await checker.readiness() == (False, {"status": "starting"})
+    await checker.warm_up()
+    ready, result = await checker.readiness()
+    assert ready and result["checks"]["mongo"]["status"] == "up"
+    checker.mark_stopping()
+    assert await checker.readiness() == (False, {"status": "stopping"})
+
+async def test_sigterm_fails_readiness_before_shutdown(checker, sigterm_calls):
+    await checker.warm_up()
+    checker.install_drain_handler(0.2)
+
+    os.kill(os.getpid(), signal.SIGTERM)
+    await asyncio.sleep(0.05)
+    assert await checker.readiness() == (False, {"status": "stopping"})
+    assert sigterm_calls == []
+
+    await asyncio.sleep(0.3)
+    assert sigterm_calls == [signal.SIGTERM]
+
+async def test_second_sigterm_is_passed_on_immediately(checker, sigterm_calls):
+    await checker.warm_up()
+    checker.install_drain_handler(10)
+    os.kill(os.getpid(), signal.SIGTERM)
+    await asyncio.sleep(0.05)
+    os.kill(os.getpid(), signal.SIGTERM)
+    await asyncio.sleep(0.05)
+    assert sigterm_calls == [signal.SIGTERM]
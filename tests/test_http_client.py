@@ -0,0 +1,93 @@
+import asyncio
+import httpx
+import pytest
+from utils.http_client import OutboundHTTP
+
+pytestmark = pytest.mark.anyio
+
+def started(handler, **options) -> OutboundHTTP:
+    http = OutboundHTTP(retry_backoff=0, **options)
+    http.start(httpx.MockTransport(handler))
+    return http
+
+async def test_idempotent_request_is_retried_on_gateway_errors():
+    statuses = iter([503, 502, 200])
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        return httpx.Response(next(statuses))
+
+    http = started(handler, retries=2)
+    response = await http.get("https://api.example.com/user")
+    assert response.status_code == 200
+    assert len(calls) == 3
+    await http.close()
+
+async def test_last_failed_response_is_returned():
+    http = started(lambda request: httpx.Response(504), retries=1)
+    response = await http.get("https://api.example.com/user")
+    assert response.status_code == 504
+    await http.close()
+
+async def test_post_is_not_retried():
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        return httpx.Response(503)
+
+    http = started(handler, retries=2)
+    response = await http.post("https://github.com/login/oauth/access_token")
+    assert response.status_code == 503
+    assert calls == ["POST"]
+    await http.close()
+
+async def test_transport_errors_are_retried_then_raised():
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        raise httpx.ConnectError("connection refused", request=request)
+
+    http = started(handler, retries=2)
+    with pytest.raises(httpx.ConnectError):
+        await http.get("https://api.example.com/user")
+    assert len(calls) == 3
+    await http.close()
+
+async def test_client_errors_are_not_retried():
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        return httpx.Response(404)
+
+    http = started(handler, retries=2)
+    assert (await http.get("https://api.example.com/user")).status_code == 404
+    assert len(calls) == 1
+    await http.close()
+
+async def test_concurrency_is_limited_per_host():
+    active = {"api.example.com": 0, "other.example.com": 0}
+    peak = dict(active)
+
+    async def handler(request):
+        host = request.url.host
+        active[host] += 1
+        peak[host] = max(peak[host], active[host])
+        await asyncio.sleep(0.01)
+        active[host] -= 1
+        return httpx.Response(200)
+
+    http = started(handler, max_per_host=2)
+    await asyncio.gather(
+        *(http.get("https://api.example.com/user") for _ in range(6)),
+        *(http.get("https://other.example.com/user") for _ in range(6))
+    )
+    assert peak == {"api.example.com": 2, "other.example.com": 2}
+    await http.close()
+
+async def test_client_must_be_started():
+    with pytest.raises(RuntimeError):
+        await OutboundHTTP().get("https://api.example.com/user")
@@ -0,0 +1,56 @@
+import pytest
+from utils import lru
+from utils.lru import LRUCache
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(lru.time, "monotonic", lambda: now[0])
+    return now
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+def test_entries_expire(clock):
+    cache = LRUCache(ttl=10)
+    cache.set("a", 1)
+    clock[0] += 9.9
+    assert cache.get("a") == 1
+    clock[0] += 0.1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+def test_entry_ttl_is_capped_by_cache_ttl(clock):
+    cache = LRUCache(ttl=5)
+    cache.set("a", 1, ttl=60)
+    clock[0] += 5
+    assert cache.get("a") is None
+
+def test_non_positive_ttl_is_not_stored():
+    cache = LRUCache()
+    cache.set("a", 1, ttl=0)
+    assert len(cache) == 0
+
+def test_counts_hits_and_misses():
+    cache = LRUCache()
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_pop_and_clear():
+    cache = LRUCache()
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.pop("a") == 1
+    assert cache.pop("a", "gone") == "gone"
+    cache.clear()
+    assert cache.get("b") is None
@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+import time
+import orjson
+import pytest
+from utils.metrics import MetricsRegistry
+
+def exited_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+def write_worker_snapshot(directory, pid: int, requests: float, in_flight: float, age: float = 0.0) -> str:
+    path = os.path.join(directory, f"metrics-{pid}.json")
+    snapshot = {
+        "requests_total": {"kind": "counter", "help": "Requests", "labelnames": [], "samples": {"": requests}},
+        "in_flight": {"kind": "gauge", "help": "In flight", "labelnames": [], "samples": {"": in_flight}},
+    }
+    with open(path, "wb") as snapshot_file:
+        snapshot_file.write(orjson.dumps(snapshot))
+    if age:
+        then = time.time() - age
+        os.utime(path, (then, then))
+    return path
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = MetricsRegistry(directory=str(tmp_path), flush_interval=5.0)
+    registry.counter("requests_total", "Requests").inc(amount=2)
+    registry.gauge("in_flight", "In flight").set(1)
+    return registry
+
+def samples(registry, name: str) -> float:
+    return registry._collect()[name]["samples"][""]
+
+def test_live_workers_are_summed(registry, tmp_path):
+    write_worker_snapshot(tmp_path, os.getppid(), requests=3, in_flight=2)
+    assert samples(registry, "requests_total") == 5
+    assert samples(registry, "in_flight") == 3
+
+def test_exited_workers_are_dropped(registry, tmp_path):
+    path = write_worker_snapshot(tmp_path, exited_pid(), requests=3, in_flight=2)
+    assert samples(registry, "requests_total") == 2
+    assert samples(registry, "in_flight") == 1
+    assert not os.path.exists(path)
+
+def test_snapshots_not_rewritten_recently_are_dropped(registry, tmp_path):
+    path = write_worker_snapshot(tmp_path, os.getppid(), requests=3, in_flight=2, age=60)
+    assert samples(registry, "in_flight") == 1
+    assert not os.path.exists(path)
+
+def test_render_sums_only_live_snapshots(registry, tmp_path):
+    write_worker_snapshot(tmp_path, exited_pid(), requests=100, in_flight=5)
+    assert "requests_total 2.0" in registry.render().splitlines()
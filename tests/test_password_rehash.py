@@ -0,0 +1,44 @@
+import asyncio
+import time
+from conftest import register
+from utils.auth_utils import _store_rehash, mongodb, password_rehashes
+from utils.hash_policy import HashPolicy
+
+def stored_hash(username: str) -> str:
+    return asyncio.run(mongodb.collection.find_one({"username": username}))["hashed_password"]
+
+def set_hash(username: str, hashed_password: str) -> None:
+    asyncio.run(mongodb.collection.update_one(
+        {"username": username}, {"$set": {"hashed_password": hashed_password}}
+    ))
+
+def test_policy_flags_a_higher_or_lower_cost_for_rehash():
+    context = HashPolicy(bcrypt_rounds=5).context()
+    assert not context.needs_update(context.hash("password"))
+    assert context.needs_update(HashPolicy(bcrypt_rounds=4).context().hash("password"))
+    assert context.needs_update(HashPolicy(bcrypt_rounds=6).context().hash("password"))
+
+def test_login_writes_back_a_hash_of_the_current_policy(client):
+    register(client, "bob")
+    set_hash("bob", HashPolicy(bcrypt_rounds=5).context().hash("password"))
+    stored = password_rehashes.values.get("stored", 0)
+
+    response = client.post("/auth/token", data={"username": "bob", "password": "password"})
+    assert response.status_code == 200
+
+    deadline = time.monotonic() + 2
+    while not stored_hash("bob").startswith("$2b$04$"):
+        assert time.monotonic() < deadline, "rehash was not written back"
+        time.sleep(0.01)
+    assert password_rehashes.values.get("stored", 0) == stored + 1
+    assert client.post("/auth/token", data={"username": "bob", "password": "password"}).status_code == 200
+
+def test_rehash_does_not_overwrite_a_changed_password(client):
+    register(client, "bob")
+    current = stored_hash("bob")
+    skipped = password_rehashes.values.get("skipped", 0)
+
+    asyncio.run(_store_rehash("bob", "$2b$05$outdated", "$2b$04$rehashed"))
+
+    assert stored_hash("bob") == current
+    assert password_rehashes.values.get("skipped", 0) == skipped + 1
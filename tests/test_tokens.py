@@ -0,0 +1,96 @@
+import pytest
+from jose import JWTError, jwt
+from redis.exceptions import ConnectionError
+from conftest import register
+from utils.auth_utils import revocation_list
+from utils.tokens import TokenVerifier, load_signing_keys
+
+def token_pair(client, username: str = "bob") -> dict:
+    register(client, username)
+    response = client.post("/auth/token", data={"username": username, "password": "password"})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+def test_refresh_rotates_the_pair(client):
+    pair = token_pair(client)
+    response = client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]})
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != pair["refresh_token"]
+    assert client.get("/api/v1/users/me", headers=bearer(rotated["access_token"])).status_code == 200
+
+def test_replayed_refresh_token_is_rejected(client):
+    pair = token_pair(client)
+    assert client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]}).status_code == 200
+    replay = client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]})
+    assert replay.status_code == 401
+
+def test_refresh_token_is_not_a_bearer_token(client):
+    pair = token_pair(client)
+    assert client.get("/api/v1/users/me", headers=bearer(pair["refresh_token"])).status_code == 401
+
+def test_access_token_cannot_refresh(client):
+    pair = token_pair(client)
+    assert client.post("/auth/refresh", json={"refresh_token": pair["access_token"]}).status_code == 401
+
+def test_logout_revokes_both_tokens(client):
+    pair = token_pair(client)
+    headers = bearer(pair["access_token"])
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 200
+
+    response = client.post("/auth/logout", json={"refresh_token": pair["refresh_token"]}, headers=headers)
+    assert response.status_code == 200
+
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]}).status_code == 401
+
+class UnreachableRedis():
+    async def set(self, *args, **kwargs):
+        raise ConnectionError("Redis is down")
+
+class UnreachablePool():
+    def client(self):
+        return UnreachableRedis()
+
+@pytest.mark.parametrize("route", ["/auth/logout", "/auth/refresh"])
+def test_revocation_failure_is_a_503(client, monkeypatch, route):
+    pair = token_pair(client)
+    monkeypatch.setattr(revocation_list, "pool", UnreachablePool())
+    response = client.post(
+        route, json={"refresh_token": pair["refresh_token"]}, headers=bearer(pair["access_token"])
+    )
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+def ring(active_kid: str, secret: str, verification_keys: str | None = None) -> TokenVerifier:
+    keys = load_signing_keys("HS256", active_kid, secret, verification_keys=verification_keys)
+    return TokenVerifier(keys, active_kid)
+
+def test_rotated_ring_accepts_tokens_of_the_retired_key():
+    old_token = ring("2024", "old-secret").encode({"sub": "bob"})
+    rotated = ring("2025", "new-secret", verification_keys="2024=old-secret")
+
+    assert rotated.decode(old_token)["sub"] == "bob"
+    new_token = rotated.encode({"sub": "bob"})
+    assert jwt.get_unverified_header(new_token)["kid"] == "2025"
+    with pytest.raises(JWTError):
+        ring("2024", "old-secret").decode(new_token)
+
+def test_unknown_kid_is_rejected():
+    token = ring("other", "new-secret").encode({"sub": "bob"})
+    with pytest.raises(JWTError):
+        ring("2025", "new-secret").decode(token)
+
+def test_known_kid_with_the_wrong_key_is_rejected():
+    token = ring("2025", "forged-secret").encode({"sub": "bob"})
+    with pytest.raises(JWTError):
+        ring("2025", "new-secret").decode(token)
+
+def test_key_ring_configuration_errors():
+    with pytest.raises(ValueError):
+        load_signing_keys("HS256", "2025", "secret", verification_keys="2024")
+    with pytest.raises(ValueError):
+        TokenVerifier(load_signing_keys("HS256", "2025", "secret"), "2024")
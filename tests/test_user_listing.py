@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from conftest import register
+from utils.auth_utils import mongodb
+
+@pytest.fixture
+def users(client, superuser_headers):
+    documents = [
+        {"username": f"user{i:02d}", "email": f"user{i:02d}@example.com", "disabled": i % 3 == 0, "is_superuser": False}
+        for i in range(25)
+    ]
+    asyncio.run(mongodb.collection.insert_many(documents))
+    return sorted(["admin"] + [document["username"] for document in documents])
+
+def walk(client, headers, **params) -> tuple[list[str], int]:
+    usernames, pages, cursor = [], 0, None
+    while True:
+        response = client.get("/api/v1/users", params={**params, **({"cursor": cursor} if cursor else {})}, headers=headers)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        usernames += [user["username"] for user in page["users"]]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return usernames, pages
+
+def test_pages_cover_every_user_once_in_order(client, superuser_headers, users):
+    usernames, pages = walk(client, superuser_headers, limit=7)
+    assert usernames == users
+    assert pages == 4
+
+def test_exact_multiple_of_limit_has_no_empty_last_page(client, superuser_headers, users):
+    usernames, pages = walk(client, superuser_headers, limit=13)
+    assert usernames == users
+    assert pages == 2
+
+def test_filters_apply_to_every_page(client, superuser_headers, users):
+    usernames, _ = walk(client, superuser_headers, limit=4, disabled="true")
+    assert usernames == [f"user{i:02d}" for i in range(25) if i % 3 == 0]
+
+def test_fields_projection_keeps_username(client, superuser_headers, users):
+    response = client.get("/api/v1/users", params={"limit": 2, "fields": "email"}, headers=superuser_headers)
+    assert response.json()["users"][0] == {"username": "admin", "email": "admin@example.com"}
+    response = client.get("/api/v1/users", params={"fields": "hashed_password"}, headers=superuser_headers)
+    assert response.status_code == 400
+
+def test_cursor_is_bound_to_its_filters(client, superuser_headers, users):
+    page = client.get("/api/v1/users", params={"limit": 2, "disabled": "false"}, headers=superuser_headers).json()
+    response = client.get(
+        "/api/v1/users", params={"limit": 2, "cursor": page["next_cursor"]}, headers=superuser_headers
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cursor does not match the filters"
+
+@pytest.mark.parametrize("cursor", ["not base64!", "bm90IGpzb24=", "WzFd"])
+def test_malformed_cursors_are_rejected(client, superuser_headers, cursor):
+    response = client.get("/api/v1/users", params={"cursor": cursor}, headers=superuser_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+def test_listing_requires_a_superuser(client):
+    headers = register(client, "regular")
+    assert client.get("/api/v1/users", headers=headers).status_code == 403
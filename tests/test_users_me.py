@@ -0,0 +1,37 @@
+from conftest import register
+
+def test_users_me_etag_and_304(client):
+    headers = register(client, "bob")
+    response = client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["username"] == "bob"
+    assert "id" not in response.json()
+    etag = response.headers["etag"]
+
+    not_modified = client.get("/api/v1/users/me", headers={**headers, "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+
+def test_users_me_etag_changes_after_reregistration(client):
+    headers = register(client, "bob")
+    etag = client.get("/api/v1/users/me", headers=headers).headers["etag"]
+    assert client.delete("/api/v1/users/me", headers=headers).status_code == 200
+
+    headers = register(client, "bob")
+    response = client.get("/api/v1/users/me", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+def test_email_update_to_a_registered_email_is_rejected(client):
+    headers = register(client, "alice")
+    register(client, "carol")
+    response = client.put("/api/v1/users/me/email?email=carol@example.com", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered"
+    assert client.get("/api/v1/users/me", headers=headers).json()["email"] == "alice@example.com"
+
+def test_email_update(client):
+    headers = register(client, "alice")
+    response = client.put("/api/v1/users/me/email?email=alice@example.org", headers=headers)
+    assert response.status_code == 200
+    assert client.get("/api/v1/users/me", headers=headers).json()["email"] == "alice@example.org"